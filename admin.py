@@ -22,6 +22,8 @@ admin_router = APIRouter(prefix="/admin")
 
 # Set up templates
 templates = Jinja2Templates(directory="templates")
+# Templates do not change in a deployment; skip the per-render mtime check
+templates.env.auto_reload = os.getenv("DEBUG") == "1"
 
 # Password context for hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -5,7 +5,8 @@ import time
 import logging
 import socket
 import urllib.parse
-from sqlalchemy import engine_from_config, create_engine, text
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL
 from sqlalchemy import pool
 from alembic import context
 
@@ -18,17 +19,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Import models and database configuration
 from models import Base
+from _db_internal import mask_database_url, normalize_database_url
 
 # Function to check if a host is reachable
 def is_host_reachable(host, port, timeout=3):
     try:
-        socket.setdefaulttimeout(timeout)
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.connect((host, int(port)))
-        s.close()
-        return True
-    except Exception as e:
-        logger.warning(f"Host {host}:{port} is not reachable: {str(e)}")
+        # Per-call timeout; setdefaulttimeout would change every socket in the process
+        with socket.create_connection((host, int(port)), timeout=timeout):
+            return True
+    except OSError as e:
+        logger.warning("Host %s:%s is not reachable: %s", host, port, e)
         return False
 
 # Get database URLs from environment variables
@@ -47,10 +47,10 @@ if DATABASE_URL:
             logger.info("Using SQLite database.")
             final_database_url = DATABASE_URL
         elif is_host_reachable(parsed.hostname, parsed.port or 5432):
-            logger.info(f"Internal database host {parsed.hostname} is reachable. Using DATABASE_URL.")
+            logger.info("Internal database host %s is reachable. Using DATABASE_URL.", parsed.hostname)
             final_database_url = DATABASE_URL
         else:
-            logger.warning(f"Internal database host {parsed.hostname} is not reachable.")
+            logger.warning("Internal database host %s is not reachable.", parsed.hostname)
 
 # If internal URL doesn't work, try with public URL
 if not final_database_url and DATABASE_PUBLIC_URL:
@@ -58,10 +58,10 @@ if not final_database_url and DATABASE_PUBLIC_URL:
     parsed = urllib.parse.urlparse(DATABASE_PUBLIC_URL)
     if parsed.hostname:
         if is_host_reachable(parsed.hostname, parsed.port or 5432):
-            logger.info(f"Public database host {parsed.hostname} is reachable. Using DATABASE_PUBLIC_URL.")
+            logger.info("Public database host %s is reachable. Using DATABASE_PUBLIC_URL.", parsed.hostname)
             final_database_url = DATABASE_PUBLIC_URL
         else:
-            logger.warning(f"Public database host {parsed.hostname} is not reachable.")
+            logger.warning("Public database host %s is not reachable.", parsed.hostname)
 
 # Check for alternative PostgreSQL environment variables if no URL is working
 if not final_database_url:
@@ -73,12 +73,20 @@ if not final_database_url:
     pg_port = os.getenv("PGPORT", "5432")
     
     if pg_host and pg_database and pg_user:
-        logger.info(f"Found PostgreSQL environment variables, checking if host {pg_host} is reachable...")
+        logger.info("Found PostgreSQL environment variables, checking if host %s is reachable...", pg_host)
         if is_host_reachable(pg_host, int(pg_port)):
-            logger.info(f"PostgreSQL host {pg_host} is reachable. Constructing DATABASE_URL.")
-            final_database_url = f"postgresql://{pg_user}:{pg_password}@{pg_host}:{pg_port}/{pg_database}"
+            logger.info("PostgreSQL host %s is reachable. Constructing DATABASE_URL.", pg_host)
+            # URL.create escapes the password; it is never spliced in raw
+            final_database_url = URL.create(
+                "postgresql",
+                username=pg_user,
+                password=pg_password,
+                host=pg_host,
+                port=int(pg_port),
+                database=pg_database,
+            )
         else:
-            logger.warning(f"PostgreSQL host {pg_host} is not reachable.")
+            logger.warning("PostgreSQL host %s is not reachable.", pg_host)
 
 # If still no working URL, use SQLite as fallback
 if not final_database_url:
@@ -86,15 +94,18 @@ if not final_database_url:
     final_database_url = "sqlite:///./app.db"
 
 # Adjust the URL if it starts with postgres:// (SQLAlchemy wants postgresql://)
-if final_database_url.startswith("postgres://"):
-    final_database_url = final_database_url.replace("postgres://", "postgresql://", 1)
+final_database_url = normalize_database_url(final_database_url)
 
 # This is the Alembic Config object
 config = context.config
 
 # Set the SQLAlchemy URL
-logger.info(f"Setting database URL for migrations to: {final_database_url.split('@')[0].split(':')[0]}:****@{final_database_url.split('@')[1] if '@' in final_database_url else final_database_url}")
-config.set_main_option("sqlalchemy.url", final_database_url)
+logger.info("Setting database URL for migrations to: %s", mask_database_url(final_database_url))
+# ConfigParser interpolation treats "%" specially, so escape it in encoded passwords
+config.set_main_option(
+    "sqlalchemy.url",
+    final_database_url.render_as_string(hide_password=False).replace("%", "%%"),
+)
 
 # Interpret the config file for Python logging
 fileConfig(config.config_file_name)
@@ -123,7 +134,7 @@ def run_migrations_online():
     
     while retry_count < MAX_RETRIES:
         try:
-            logger.info(f"Attempting to connect to database for migrations (attempt {retry_count + 1}/{MAX_RETRIES})")
+            logger.info("Attempting to connect to database for migrations (attempt %s/%s)", retry_count + 1, MAX_RETRIES)
             
             # Get the URL from config
             db_url = config.get_main_option("sqlalchemy.url")
@@ -167,11 +178,11 @@ def run_migrations_online():
             
         except Exception as e:
             retry_count += 1
-            logger.error(f"Database connection failed: {str(e)}")
+            logger.error("Database connection failed: %s", e)
             
             if retry_count < MAX_RETRIES:
                 wait_time = 2 ** retry_count  # Exponential backoff
-                logger.info(f"Waiting {wait_time} seconds before retry...")
+                logger.info("Waiting %s seconds before retry...", wait_time)
                 time.sleep(wait_time)
             else:
                 logger.error("Max retries reached. Could not establish database connection for migrations.")
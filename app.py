@@ -3,6 +3,7 @@ from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+import asyncio
 import os
 import logging
 import uvicorn
@@ -25,6 +26,8 @@ except Exception as e:
 # Try to set up templates
 try:
     templates = Jinja2Templates(directory="templates")
+    # Templates do not change in a deployment; skip the per-render mtime check
+    templates.env.auto_reload = os.getenv("DEBUG") == "1"
     logger.info("Templates initialized successfully")
     TEMPLATES_AVAILABLE = True
 except Exception as e:
@@ -33,7 +36,7 @@ except Exception as e:
 
 # Try to import database components - but don't fail if they're not available
 try:
-    from database import get_db, init_db
+    from database import get_db, init_db, ensure_db_ready, is_initialized
     from sqlalchemy.orm import Session
     from models import User, Transaction, APILog
     
@@ -44,14 +47,22 @@ try:
     @app.on_event("startup")
     async def startup_db_event():
         """Initialize database on startup."""
+        if is_initialized():
+            # The entrypoint already waited for the database and ran init_db
+            logger.info("Database already initialized, skipping")
+            return
+        await ensure_db_ready()
         logger.info("Initializing database...")
-        success = init_db()
+        # init_db blocks (DDL round-trips, bcrypt for the admin seed); run it
+        # in a worker thread so the event loop keeps serving requests
+        success = await asyncio.to_thread(init_db)
         if success:
             logger.info("Database initialized successfully")
         else:
             logger.warning("Database initialization failed, some features may be limited")
     
-except ImportError as e:
+except (ImportError, RuntimeError) as e:
+    # database raises RuntimeError at import when no database is configured
     logger.warning(f"Database modules not available: {e}")
     logger.warning("Running in limited mode without database support")
     DB_AVAILABLE = False
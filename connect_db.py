@@ -1,26 +1,25 @@
 import os
+import sys
 import logging
+import concurrent.futures as cf
 import psycopg2
 from psycopg2.extras import DictCursor
 from contextlib import contextmanager
-from urllib.parse import quote_plus
+from urllib.parse import quote
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("andikar-database")
 
-def get_connection_params():
-    """Get database connection parameters from environment variables."""
-    # Priority 1: Use direct DATABASE_URL
+def _database_url():
+    """Get DATABASE_URL, normalised to the postgresql:// scheme."""
     db_url = os.getenv("DATABASE_URL")
-    if db_url:
-        # Convert postgres:// to postgresql:// if needed
-        if db_url.startswith("postgres://"):
-            db_url = db_url.replace("postgres://", "postgresql://", 1)
-        logger.info("Using DATABASE_URL environment variable")
-        return db_url
-    
-    # Priority 2: Construct URL from proxy settings
+    if db_url and db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql://", 1)
+    return db_url
+
+def _proxy_url():
+    """Construct a connection string for the Railway TCP proxy, if configured."""
     proxy_domain = os.getenv("RAILWAY_TCP_PROXY_DOMAIN")
     proxy_port = os.getenv("RAILWAY_TCP_PROXY_PORT")
     user = os.getenv("PGUSER", "postgres")
@@ -28,23 +27,115 @@ def get_connection_params():
     db = os.getenv("PGDATABASE", "railway")
     
     if proxy_domain and proxy_port and password:
-        # Use quote_plus to properly encode the password
-        encoded_password = quote_plus(password)
-        db_url = f"postgresql://{user}:{encoded_password}@{proxy_domain}:{proxy_port}/{db}"
-        logger.info(f"Using Railway TCP proxy connection")
-        return db_url
-    
-    # Fallback to direct connection parameters
+        # Percent-encode the whole password; quote_plus would turn spaces into
+        # "+", which libpq does not decode back
+        encoded_password = quote(password, safe="")
+        return f"postgresql://{user}:{encoded_password}@{proxy_domain}:{proxy_port}/{db}"
+    return None
+
+def _direct_params():
+    """Get direct connection parameters from the PG* environment variables."""
     return {
         "host": os.getenv("PGHOST", "localhost"),
         "port": os.getenv("PGPORT", 5432),
-        "user": user,
-        "password": password,
-        "database": db,
+        "user": os.getenv("PGUSER", "postgres"),
+        "password": os.getenv("PGPASSWORD") or os.getenv("POSTGRES_PASSWORD"),
+        "database": os.getenv("PGDATABASE", "railway"),
         "connect_timeout": 10,
         "application_name": "andikar_backend_api"
     }
 
+def get_connection_params():
+    """Get database connection parameters from environment variables."""
+    # Priority 1: Use direct DATABASE_URL
+    db_url = _database_url()
+    if db_url:
+        logger.info("Using DATABASE_URL environment variable")
+        return db_url
+    
+    # Priority 2: Construct URL from proxy settings
+    proxy_url = _proxy_url()
+    if proxy_url:
+        logger.info("Using Railway TCP proxy connection")
+        return proxy_url
+    
+    # Fallback to direct connection parameters
+    return _direct_params()
+
+def get_connection_candidates():
+    """Get every configured connection target as (name, params) pairs, in priority order."""
+    candidates = []
+    db_url = _database_url()
+    if db_url:
+        candidates.append(("DATABASE_URL", db_url))
+    proxy_url = _proxy_url()
+    if proxy_url:
+        candidates.append(("TCP proxy", proxy_url))
+    candidates.append(("direct", _direct_params()))
+    return candidates
+
+def try_connect(params, name, connect_timeout=3):
+    """Try to open a connection, returning it on success or None on failure."""
+    try:
+        if isinstance(params, str):
+            connection = psycopg2.connect(params, connect_timeout=connect_timeout)
+        else:
+            connection = psycopg2.connect(**{**params, "connect_timeout": connect_timeout})
+        logger.info("✅ Connected using %s", name)
+        return connection
+    except Exception as e:
+        logger.warning("Could not connect using %s: %s", name, e)
+        return None
+
+def _close_connection(future):
+    """Done-callback that closes a connection nobody is going to use."""
+    if not future.cancelled() and future.exception() is None and future.result() is not None:
+        future.result().close()
+
+def main():
+    """Try all connection targets concurrently and report the first one that works."""
+    candidates = get_connection_candidates()
+    
+    # Fire every attempt at once so an unreachable host costs at most one
+    # connect_timeout instead of delaying the next attempt
+    executor = cf.ThreadPoolExecutor(max_workers=len(candidates))
+    futures = {executor.submit(try_connect, params, name): name for name, params in candidates}
+    connection = None
+    winner = None
+    try:
+        for future in cf.as_completed(futures):
+            connection = future.result()
+            if connection is not None:
+                winner = futures[future]
+                break
+    finally:
+        # Close the slower attempts as they finish instead of waiting for them
+        for future in futures:
+            if futures[future] != winner:
+                future.add_done_callback(_close_connection)
+        executor.shutdown(wait=False)
+    
+    if connection is None:
+        logger.error("❌ Could not connect to the database using any configured method")
+        return 1
+    
+    try:
+        with connection.cursor() as cursor:
+            # Gather all introspection in one round-trip, aggregated server-side
+            cursor.execute("""
+                SELECT current_database(), current_user,
+                    (SELECT string_agg(schema_name, ', ') FROM information_schema.schemata),
+                    (SELECT string_agg(tablename, ', ') FROM pg_catalog.pg_tables
+                     WHERE schemaname = 'public')
+            """)
+            database, user, schemas, tables = cursor.fetchone()
+            logger.info("Connected to database: %s as user: %s (via %s)", database, user, winner)
+            logger.info("Schemas: %s", schemas or "none")
+            logger.info("Tables in public schema: %s", tables or "none")
+    finally:
+        connection.close()
+    return 0
+
 @contextmanager
 def get_db_connection():
     """Get a database connection context manager."""
@@ -62,7 +153,7 @@ def get_db_connection():
         connection.autocommit = True
         yield connection
     except Exception as e:
-        logger.error(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
         raise
     finally:
         if connection:
@@ -95,3 +186,6 @@ def execute_and_commit(query, params=None):
     with get_db_cursor() as cursor:
         cursor.execute(query, params or ())
         return cursor.rowcount
+
+if __name__ == "__main__":
+    sys.exit(main())
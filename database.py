@@ -1,96 +1,232 @@
 import os
+import asyncio
+import functools
+import hashlib
 import logging
+import random
 import time
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
-from urllib.parse import quote_plus
+from db_base import Base  # re-exported for existing imports
+from _db_internal import (
+    PLAN_ROWS,
+    create_missing_tables,
+    dialect_insert,
+    insert_ignoring_conflicts,
+    json_engine_options,
+    mask_database_url,
+    asyncpg_url,
+    normalize_database_url,
+    resolve_seed_password_hash,
+    with_preferred_driver,
+)
+
+try:
+    # Optional async driver so request handlers don't block the event loop
+    import asyncpg  # noqa: F401
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    ASYNC_DB_AVAILABLE = True
+except ImportError:
+    AsyncSession = None
+    ASYNC_DB_AVAILABLE = False
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("andikar-database")
 
-# Create base class for SQLAlchemy models
-Base = declarative_base()
+@dataclass(frozen=True)
+class RetryConfig:
+    """Retry policy for database connection attempts."""
+    max_attempts: int = 5
+    initial_delay: float = 0.5
+    max_delay: float = 30.0
+    backoff_multiplier: float = 2.0
+
+@dataclass(frozen=True)
+class EnvConfig:
+    """Snapshot of the environment variables used for database setup."""
+    database_url: Optional[str]
+    pg_user: str
+    pg_password: Optional[str]
+    pg_db: str
+    proxy_domain: Optional[str]
+    proxy_port: Optional[str]
+    admin_username: str
+    admin_password: str
+    admin_password_hash: Optional[str]
+    admin_email: str
+    pool_size: int
+    max_overflow: int
+    pool_timeout: int
+    pool_recycle: int
+    async_pool_size: int
+    allow_sqlite_fallback: bool
+    auto_create: bool
+    bcrypt_rounds: int
+    retry: RetryConfig
+
+@functools.lru_cache(maxsize=1)
+def _env():
+    """Read the environment once; it does not change during the process lifetime."""
+    return EnvConfig(
+        database_url=os.getenv("DATABASE_URL"),
+        pg_user=os.getenv("PGUSER", "postgres"),
+        pg_password=os.getenv("PGPASSWORD") or os.getenv("POSTGRES_PASSWORD"),
+        pg_db=os.getenv("PGDATABASE", "railway"),
+        proxy_domain=os.getenv("RAILWAY_TCP_PROXY_DOMAIN"),
+        proxy_port=os.getenv("RAILWAY_TCP_PROXY_PORT"),
+        admin_username=os.getenv("ADMIN_USERNAME", "admin"),
+        admin_password=os.getenv("ADMIN_PASSWORD", "admin123"),
+        admin_password_hash=os.getenv("ADMIN_PASSWORD_HASH"),
+        admin_email=os.getenv("ADMIN_EMAIL", "admin@andikar.com"),
+        pool_size=int(os.getenv("DB_POOL_SIZE") or min((os.cpu_count() or 1) * 2, 10)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        # Recycle before Railway's proxy kills connections idle for ~15 minutes
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "900")),
+        # The async engine only serves health checks, so a small pool suffices
+        async_pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", "2")),
+        allow_sqlite_fallback=os.getenv("ALLOW_SQLITE_FALLBACK") == "1",
+        auto_create=os.getenv("DB_AUTO_CREATE", "1") == "1",
+        bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "10")),
+        retry=RetryConfig(
+            max_attempts=int(os.getenv("DB_CONNECT_MAX_ATTEMPTS", "5")),
+            initial_delay=float(os.getenv("DB_RETRY_INITIAL_DELAY", "0.5")),
+            max_delay=float(os.getenv("DB_RETRY_MAX_DELAY", "30")),
+            backoff_multiplier=float(os.getenv("DB_RETRY_BACKOFF_MULTIPLIER", "2")),
+        ),
+    )
 
+@functools.lru_cache(maxsize=1)
 def get_database_url():
     """Get the database URL from environment variables."""
+    env = _env()
+    
     # Priority 1: Use the direct DATABASE_URL if available
-    db_url = os.getenv("DATABASE_URL")
-    if db_url:
-        # Convert postgres:// to postgresql:// if needed
-        if db_url.startswith("postgres://"):
-            db_url = db_url.replace("postgres://", "postgresql://", 1)
-        logger.info(f"Using DATABASE_URL from environment")
-        return db_url
+    if env.database_url:
+        logger.info("Using DATABASE_URL from environment")
+        return normalize_database_url(env.database_url)
 
     # Priority 2: Construct from proxy variables
-    proxy_domain = os.getenv("RAILWAY_TCP_PROXY_DOMAIN")
-    proxy_port = os.getenv("RAILWAY_TCP_PROXY_PORT")
-    user = os.getenv("PGUSER", "postgres")
-    password = os.getenv("PGPASSWORD") or os.getenv("POSTGRES_PASSWORD")
-    db = os.getenv("PGDATABASE", "railway")
-    
-    if proxy_domain and proxy_port and password:
-        # Use quote_plus to properly encode the password
-        encoded_password = quote_plus(password)
-        db_url = f"postgresql://{user}:{encoded_password}@{proxy_domain}:{proxy_port}/{db}"
-        logger.info(f"Using Railway TCP proxy connection: {proxy_domain}:{proxy_port}")
-        return db_url
+    if env.proxy_domain and env.proxy_port and env.pg_password:
+        logger.info("Using Railway TCP proxy connection: %s:%s", env.proxy_domain, env.proxy_port)
+        return URL.create(
+            "postgresql",
+            username=env.pg_user,
+            password=env.pg_password,
+            host=env.proxy_domain,
+            port=int(env.proxy_port),
+            database=env.pg_db,
+        )
     
     # No PostgreSQL connection available
     return None
 
-def create_db_engine(max_attempts=5, retry_interval=2):
-    """Create database engine with retry logic."""
-    database_url = get_database_url()
+def _backoff(attempt, config):
+    """Return the delay before retry number `attempt` (0-based).
     
-    if not database_url:
-        logger.error("No PostgreSQL connection configuration found")
-        logger.warning("⚠️ Creating SQLite fallback engine - FOR DEVELOPMENT ONLY")
-        return create_engine("sqlite:///andikar.db")
-    
-    # Mask password in logs
-    safe_url = database_url
-    if os.getenv("PGPASSWORD"):
-        safe_url = safe_url.replace(os.getenv("PGPASSWORD", ""), "*" * 8)
-    if os.getenv("POSTGRES_PASSWORD"):
-        safe_url = safe_url.replace(os.getenv("POSTGRES_PASSWORD", ""), "*" * 8)
-    logger.info(f"Database URL: {safe_url}")
+    The delay grows exponentially up to max_delay and is jittered to 75-100%
+    of that value so replicas restarting together do not retry in lockstep.
+    """
+    delay = min(config.initial_delay * config.backoff_multiplier ** attempt, config.max_delay)
+    return delay * random.uniform(0.75, 1.0)
+
+def call_with_retry(func, retry_config=None, retry_on=(OperationalError,)):
+    """Call func, retrying transient errors with jittered exponential backoff.
     
-    # Try to connect to the database with retries
+    Only exceptions in retry_on are retried; anything else (and the last
+    transient error) propagates to the caller.
+    """
+    retry_config = retry_config or _env().retry
+    max_attempts = retry_config.max_attempts
     for attempt in range(1, max_attempts + 1):
         try:
-            logger.info(f"Attempting to connect to database (attempt {attempt}/{max_attempts})...")
-            engine = create_engine(
-                database_url,
-                pool_size=5,
-                max_overflow=10,
-                pool_timeout=30,
-                pool_recycle=1800,
-                connect_args={
-                    "connect_timeout": 10,
-                    "application_name": "andikar_backend_api"
-                }
-            )
-            engine.connect().close()  # Test connection
-            logger.info("✅ Database connection successful!")
-            return engine
-        except Exception as e:
-            logger.warning(f"Database connection attempt {attempt} failed: {e}")
-            if attempt < max_attempts:
-                backoff = 2 ** (attempt - 1)
-                logger.info(f"Retrying in {backoff} seconds...")
-                time.sleep(backoff)
-            else:
-                logger.error(f"❌ All {max_attempts} database connection attempts failed")
-                logger.error(f"Last connection error: {e}")
-                logger.warning("⚠️ Creating SQLite fallback engine - FOR DEVELOPMENT ONLY")
-                return create_engine("sqlite:///andikar.db")
+            return func()
+        except retry_on as e:
+            logger.warning("Attempt %d/%d failed: %s", attempt, max_attempts, e)
+            if attempt == max_attempts:
+                raise
+            backoff = _backoff(attempt - 1, retry_config)
+            logger.info("Retrying in %.1f seconds...", backoff)
+            time.sleep(backoff)
+
+def sqlite_fallback_engine(reason):
+    """Return the local SQLite engine if ALLOW_SQLITE_FALLBACK=1, else fail fast."""
+    if not _env().allow_sqlite_fallback:
+        raise RuntimeError(f"No database reachable: {reason}")
+    logger.warning("⚠️ Creating SQLite fallback engine - FOR DEVELOPMENT ONLY")
+    return create_engine("sqlite:///andikar.db", **json_engine_options())
+
+def create_db_engine():
+    """Create the database engine.
+    
+    Connections are opened lazily; call wait_for_db() or ensure_db_ready()
+    to block until the database answers. Raises RuntimeError when no
+    PostgreSQL configuration is present, unless ALLOW_SQLITE_FALLBACK=1.
+    """
+    database_url = DATABASE_URL
+    env = _env()
+    
+    if database_url is None:
+        logger.error("No PostgreSQL connection configuration found")
+        return sqlite_fallback_engine("no PostgreSQL connection configuration found")
+    
+    logger.info("Database URL: %s", _MASKED_URL)
+    
+    connect_args = {
+        "connect_timeout": 3,
+        "application_name": "andikar_backend_api",
+        # Keep idle pooled connections alive through Railway's proxy
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 5,
+        # Fail sends that go unacknowledged for 30s instead of waiting on TCP retransmits
+        # (libpq already sets TCP_NODELAY on its sockets, so there is no Nagle delay to disable)
+        "tcp_user_timeout": 30000
+    }
+    driver_options = {}
+    database_url = with_preferred_driver(database_url)
+    if database_url.drivername == "postgresql+psycopg":
+        # Prepare statements server-side after they have run a few times
+        connect_args["prepare_threshold"] = 5
+    elif database_url.get_driver_name() == "psycopg2":
+        # psycopg2: batch executemany() UPDATE/DELETEs with execute_batch
+        # (INSERTs already use multi-row VALUES)
+        driver_options["executemany_mode"] = "values_plus_batch"
+        driver_options["executemany_batch_page_size"] = 500
+    
+    return create_engine(
+        database_url,
+        pool_size=env.pool_size,
+        max_overflow=env.max_overflow,
+        pool_timeout=env.pool_timeout,
+        pool_recycle=env.pool_recycle,
+        # Reuse the most recently returned connection so idle ones can expire
+        pool_use_lifo=True,
+        pool_pre_ping=True,
+        # Larger compiled-statement cache than the default 500 entries
+        query_cache_size=1024,
+        # Rows per multi-row INSERT statement
+        insertmanyvalues_page_size=500,
+        connect_args=connect_args,
+        **driver_options,
+        **json_engine_options()
+    )
+
+# Resolve the URL once; the masked form is reused for all logging
+DATABASE_URL = get_database_url()
+_MASKED_URL = mask_database_url(DATABASE_URL) if DATABASE_URL is not None else None
 
 # Create engine and session factory
 engine = create_db_engine()
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 def get_db():
     """Get a database session."""
@@ -100,6 +236,166 @@ def get_db():
     finally:
         db.close()
 
+def create_async_db_engine(sync_engine):
+    """Create an asyncpg engine alongside the sync engine, or None if unavailable."""
+    if not ASYNC_DB_AVAILABLE or sync_engine.dialect.name != "postgresql":
+        return None
+    env = _env()
+    try:
+        return _create_async_engine(asyncpg_url(sync_engine.url), env)
+    except Exception as e:
+        logger.warning("Async database engine unavailable, using the sync engine: %s", e)
+        return None
+
+def _create_async_engine(url, env):
+    # Its own small pool, on top of the sync pool's DB_POOL_SIZE + DB_MAX_OVERFLOW
+    return create_async_engine(
+        url,
+        pool_size=env.async_pool_size,
+        max_overflow=0,
+        pool_timeout=env.pool_timeout,
+        pool_recycle=env.pool_recycle,
+        pool_use_lifo=True,
+        pool_pre_ping=True,
+        connect_args={
+            "timeout": 3,
+            "server_settings": {"application_name": "andikar_backend_api"},
+        },
+        **json_engine_options(),
+    )
+
+# Async engine and session factory (None when asyncpg is not installed or on SQLite)
+async_engine = create_async_db_engine(engine)
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    if async_engine is not None else None
+)
+
+async def get_async_db():
+    """Get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Cleared by ping_database() when the async engine turns out to be unusable
+_async_ping_usable = True
+
+def _ping_sync():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+async def ping_database():
+    """Run SELECT 1 without blocking the event loop.
+    
+    Uses the asyncpg engine when available, otherwise runs the sync
+    check in a worker thread. Connection errors propagate; if the async
+    engine fails in any other way (e.g. a connect argument asyncpg does not
+    accept), the sync check is used from then on.
+    """
+    global _async_ping_usable
+    if async_engine is not None and _async_ping_usable:
+        try:
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return
+        except (OperationalError, OSError):
+            raise
+        except Exception as e:
+            logger.warning("Async database ping failed, falling back to the sync engine: %s", e)
+            _async_ping_usable = False
+    await asyncio.to_thread(_ping_sync)
+
+def wait_for_db(retry_config=None):
+    """Block until the database answers, retrying transient connection errors."""
+    call_with_retry(_ping_sync, retry_config)
+    logger.info("✅ Database connection successful!")
+
+async def ensure_db_ready(retry_config=None):
+    """Wait for the database without blocking the event loop.
+    
+    Meant for FastAPI startup handlers; raises RuntimeError once the retry
+    budget is exhausted so the process exits and the platform restarts it.
+    """
+    retry_config = retry_config or _env().retry
+    max_attempts = retry_config.max_attempts
+    for attempt in range(1, max_attempts + 1):
+        try:
+            await ping_database()
+            logger.info("✅ Database connection successful!")
+            return
+        except (OperationalError, OSError) as e:
+            logger.warning("Database connection attempt %d/%d failed: %s", attempt, max_attempts, e)
+            if attempt == max_attempts:
+                raise RuntimeError(f"No database reachable: {e}") from e
+            backoff = _backoff(attempt - 1, retry_config)
+            logger.info("Retrying in %.1f seconds...", backoff)
+            await asyncio.sleep(backoff)
+
+# One-row table recording the fingerprint of the last schema created by init_db
+SCHEMA_META = Table(
+    "_schema_meta",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+)
+
+def schema_fingerprint():
+    """Hash the model table and column names so an unchanged schema can be detected."""
+    shape = sorted(
+        (table.name, tuple(column.name for column in table.columns))
+        for table in Base.metadata.tables.values()
+    )
+    return hashlib.sha256(repr(shape).encode()).hexdigest()
+
+def create_tables():
+    """Run create_all unless the stored schema fingerprint is already current."""
+    fingerprint = schema_fingerprint()
+    with engine.begin() as conn:
+        SCHEMA_META.create(conn, checkfirst=True)
+        stored = conn.scalar(select(SCHEMA_META.c.fingerprint).where(SCHEMA_META.c.id == 1))
+        if stored == fingerprint:
+            logger.info("Schema fingerprint unchanged, skipping create_all")
+            return
+        
+        create_missing_tables(Base.metadata, conn)
+        stmt = dialect_insert(SCHEMA_META, conn).values(id=1, fingerprint=fingerprint)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={"fingerprint": stmt.excluded.fingerprint},
+        ))
+        logger.info("Database tables created")
+
+# Advisory lock key ("NAIK") serializing init_db across workers and replicas
+INIT_LOCK_KEY = 0x4e41494b
+
+@contextmanager
+def init_lock():
+    """Hold the init advisory lock for the duration of the block.
+    
+    Waits for any worker already initializing, so nobody reports success
+    before the tables and seed data exist; the work behind the lock is
+    idempotent and fingerprint-gated, so the followers finish quickly. The
+    lock is session-scoped and held on a dedicated connection. Non-PostgreSQL
+    engines do not lock.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": INIT_LOCK_KEY})
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INIT_LOCK_KEY})
+            conn.commit()
+
+# Set once init_db() has succeeded in this process
+_initialized = False
+
+def is_initialized():
+    """Whether init_db() has already succeeded in this process."""
+    return _initialized
+
 def init_db():
     """Initialize database with seed data.
     
@@ -108,88 +404,64 @@ def init_db():
     Returns True if successful, False otherwise.
     """
     try:
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
+        wait_for_db()
         
-        # Import models here to avoid circular imports
-        from models import User, PricingPlan
-        
-        # Create session for seeding
-        with SessionLocal() as db:
-            # Check if we need to create pricing plans
-            plan_count = db.query(PricingPlan).count()
-            if plan_count == 0:
-                logger.info("Creating default pricing plans...")
-                
-                # Create default pricing plans
-                plans = [
-                    PricingPlan(
-                        id="free",
-                        name="Free",
-                        description="Basic plan with limited usage",
-                        price=0.0,
-                        word_limit=1000,
-                        requests_per_day=10,
-                        features=["Basic text humanization"],
-                        is_active=True
-                    ),
-                    PricingPlan(
-                        id="basic",
-                        name="Basic",
-                        description="Standard plan for regular users",
-                        price=9.99,
-                        word_limit=10000,
-                        requests_per_day=100,
-                        features=["Advanced text humanization", "AI detection"],
-                        is_active=True
-                    ),
-                    PricingPlan(
-                        id="pro",
-                        name="Professional",
-                        description="Advanced plan for professional users",
-                        price=29.99,
-                        word_limit=50000,
-                        requests_per_day=500,
-                        features=["Premium text humanization", "Advanced AI detection", "Priority support"],
-                        is_active=True
-                    )
-                ]
-                
-                db.add_all(plans)
+        with init_lock():
+            # Import models here so they are registered on Base before create_all
+            from models import User, PricingPlan
+            
+            # Create all tables, unless migrations manage the schema
+            if _env().auto_create:
+                create_tables()
+            else:
+                logger.info("DB_AUTO_CREATE=0, leaving schema management to migrations")
+            
+            # Create session for seeding
+            with SessionLocal() as db:
+                # Seed pricing plans; existing rows are left untouched
+                db.execute(insert_ignoring_conflicts(PricingPlan, engine).values(PLAN_ROWS))
                 db.commit()
-                logger.info("Default pricing plans created")
-                
-            # Check if we need to create admin user
-            admin_user = db.query(User).filter(User.username == "admin").first()
-            if not admin_user:
-                logger.info("Creating admin user...")
                 
-                # Import bcrypt here to avoid circular imports
-                import bcrypt
-                
-                # Create admin user with default password
-                password = "admin123"
-                hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                
-                admin = User(
-                    username="admin",
-                    email="admin@andikar.com",
-                    full_name="Admin User",
-                    hashed_password=hashed_password,
-                    plan_id="pro",
-                    words_used=0,
-                    payment_status="Paid",
-                    is_active=True
+                # Check if we need to create admin user
+                env = _env()
+                has_admin = db.scalar(
+                    select(select(User.id).where(User.username == env.admin_username).exists())
                 )
-                
-                db.add(admin)
-                db.commit()
-                logger.info("Admin user created")
-                
+                if not has_admin:
+                    logger.info("Creating admin user...")
+                    
+                    # End the read transaction so the connection is not held
+                    # while bcrypt runs
+                    db.commit()
+                    
+                    # Use a pre-computed hash when given; otherwise hash the
+                    # configured (or default) password
+                    hashed_password = resolve_seed_password_hash(
+                        env.admin_password,
+                        env.admin_password_hash,
+                        env.bcrypt_rounds,
+                    )
+                    
+                    db.execute(
+                        insert_ignoring_conflicts(User, engine).values(
+                            username=env.admin_username,
+                            email=env.admin_email,
+                            full_name="Admin User",
+                            hashed_password=hashed_password,
+                            plan_id="pro",
+                            words_used=0,
+                            payment_status="Paid",
+                            is_active=True,
+                        )
+                    )
+                    db.commit()
+                    logger.info("Admin user created")
+
         logger.info("Database initialization completed successfully")
+        global _initialized
+        _initialized = True
         return True
     except Exception as e:
-        logger.error(f"Error initializing database: {e}")
-        import traceback
+        logger.error("Error initializing database: %s", e)
         logger.error(traceback.format_exc())
         return False
@@ -0,0 +1,9 @@
+"""
+Declarative base shared by database.py, models.py and the init scripts.
+Kept in its own module so every model registers on the same metadata
+without importing the engine.
+"""
+from sqlalchemy.orm import declarative_base
+
+# Create base class for SQLAlchemy models
+Base = declarative_base()
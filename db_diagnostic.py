@@ -7,17 +7,22 @@ connection methods and reporting detailed information about the database environ
 """
 
 import os
+import atexit
 import sys
 import socket
+import functools
 import logging
-from urllib.parse import urlparse
-import time
+from urllib.parse import quote
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
-    import psycopg2
-    import sqlalchemy
+    # The PostgreSQL driver is loaded by SQLAlchemy when a PostgreSQL
+    # connection is first opened, so SQLite-only runs never import it
     from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.pool import NullPool, StaticPool
+    from _db_internal import mask_password, with_preferred_driver
 except ImportError:
     print("Please install required packages: pip install psycopg2-binary sqlalchemy")
     sys.exit(1)
@@ -26,95 +31,160 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("db-diagnostics")
 
+@functools.lru_cache(maxsize=32)
 def check_connectivity(host, port, timeout=3):
-    """Check if a host:port is reachable."""
+    """Check if a host:port is reachable.
+    
+    Results are cached per (host, port, timeout) so the same endpoint is
+    never probed twice in one run.
+    """
     try:
-        socket.setdefaulttimeout(timeout)
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.connect((host, port))
-        s.close()
-        return True
-    except socket.error as e:
-        logger.warning(f"Host {host}:{port} is not reachable: {e}")
+        # Per-call timeout; setdefaulttimeout would change every socket in the process
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError as e:
+        logger.warning("Host %s:%s is not reachable: %s", host, port, e)
         return False
 
-def mask_password(url):
-    """Mask the password in a database URL for safe logging."""
+def url_endpoint(url):
+    """Return the (host, port) of a PostgreSQL URL, or None if it has no host."""
     if not url:
-        return "Not set"
+        return None
     try:
-        parsed = urlparse(url)
-        if parsed.password:
-            masked = parsed._replace(netloc=parsed.netloc.replace(
-                parsed.password, "****"))
-            return masked.geturl()
-        return url
+        parsed = make_url(url)
     except Exception:
-        return url
+        return None
+    if not parsed.host or not parsed.drivername.startswith("postgres"):
+        return None
+    return parsed.host, parsed.port or 5432
+
+def _create_engine(connection_string):
+    """Create the engine for a candidate connection string.
+    
+    The connection is checked once by opening it; there is no pre-ping, and
+    no reset on close since every check ends its own transaction.
+    """
+    url = with_preferred_driver(connection_string)
+    if url.get_backend_name() == "sqlite":
+        # The connection is opened on a worker thread and used from the main
+        # one; StaticPool keeps the in-memory database on that one connection
+        return create_engine(
+            url,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+            pool_reset_on_return=None,
+        )
+    return create_engine(
+        url,
+        poolclass=NullPool,
+        pool_pre_ping=False,
+        pool_reset_on_return=None,
+        # Same bound as the TCP probes, which no longer run for these hosts
+        connect_args={"connect_timeout": 3},
+    )
+
+# Engines by connection string, reused when main() runs more than once in a process
+_engines = {}
+
+def _engine(connection_string):
+    """Return the cached engine for a connection string, creating it on first use."""
+    engine = _engines.get(connection_string)
+    if engine is None:
+        engine = _engines.setdefault(connection_string, _create_engine(connection_string))
+    return engine
+
+@atexit.register
+def _dispose_engines():
+    """Dispose every cached engine when the process exits."""
+    for engine in _engines.values():
+        engine.dispose()
+
+def open_connection(connection_string):
+    """Open a single connection for a candidate connection string."""
+    return _engine(connection_string).connect()
 
-def test_connection(engine, conn_str, masked_conn_str):
-    """Test a database connection and return detailed information."""
+def _close_connection(future):
+    """Done-callback that closes a connection nobody is going to use."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+def connect_first(candidates):
+    """Try all candidates concurrently and return the first open connection.
+    
+    Connections that succeed after the winner are closed as they finish.
+    Returns None if every candidate fails.
+    """
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    futures = {executor.submit(open_connection, conn_str): (name, masked)
+               for name, conn_str, masked in candidates}
+    winner = None
     try:
-        conn = engine.connect()
-        print(f"✅ Connection successful!")
-        
-        # Get database version
-        try:
-            result = conn.execute(text("SELECT version();"))
-            row = result.fetchone()
-            if row:
-                print(f"Database version: {row[0]}")
-        except Exception:
-            print("Could not get database version")
-        
-        # Get current database
-        try:
-            result = conn.execute(text("SELECT current_database(), current_user;"))
-            row = result.fetchone()
-            if row:
-                print(f"Current database: {row[0]}, Current user: {row[1]}")
-        except Exception:
-            print("Could not get current database/user information")
-        
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"❌ Connection failed: {e}")
-        return False
+        for future in as_completed(futures):
+            name, masked = futures[future]
+            try:
+                winner = future.result()
+            except Exception as e:
+                print(f"❌ {name} failed: {e}")
+                continue
+            print(f"✅ Connection successful via {name}: {masked}")
+            del futures[future]
+            break
+    finally:
+        # Close any other connection that succeeds, now or later
+        for future in futures:
+            future.add_done_callback(_close_connection)
+        executor.shutdown(wait=False, cancel_futures=True)
+    return winner
 
-def get_tables(engine):
+def test_connection(conn):
+    """Print version, database and user details for an open connection."""
+    # Get version, database, user and schema in one round-trip
+    try:
+        row = conn.execute(text(
+            "SELECT version(), current_database(), current_user, current_schema();"
+        )).fetchone()
+        if row:
+            print(f"Database version: {row[0]}")
+            print(f"Current database: {row[1]}, Current user: {row[2]}, Current schema: {row[3]}")
+    except Exception:
+        print("Could not get database version/user information")
+    finally:
+        # End the read transaction so the next check starts clean
+        conn.rollback()
+
+def get_tables(conn):
     """Get a list of tables in the database."""
     try:
-        conn = engine.connect()
-        
-        # Try PostgreSQL version first
-        try:
+        if conn.dialect.name == "postgresql":
+            # Schemas, tables and planner row estimates (pg_class.reltuples)
+            # in one query instead of a query per schema and COUNT(*) per table
             result = conn.execute(text("""
-                SELECT schema_name 
-                FROM information_schema.schemata 
-                WHERE schema_name NOT LIKE 'pg_%' 
-                AND schema_name != 'information_schema';
+                SELECT n.nspname, c.relname, c.reltuples::bigint
+                FROM pg_catalog.pg_namespace n
+                LEFT JOIN pg_catalog.pg_class c
+                    ON c.relnamespace = n.oid AND c.relkind IN ('r', 'p')
+                WHERE n.nspname NOT LIKE 'pg_%'
+                AND n.nspname != 'information_schema'
+                ORDER BY n.nspname, c.relname;
             """))
-            schemas = [row[0] for row in result]
-            print(f"Available schemas: {', '.join(schemas)}")
+            tables_by_schema = {}
+            for schema, table, estimate in result:
+                tables = tables_by_schema.setdefault(schema, [])
+                if table is not None:
+                    tables.append((table, estimate))
+            print(f"Available schemas: {', '.join(tables_by_schema)}")
             
-            for schema in schemas:
-                result = conn.execute(text(f"""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_schema = '{schema}' 
-                    AND table_type = 'BASE TABLE';
-                """))
-                tables = [row[0] for row in result]
-                
+            for schema, tables in tables_by_schema.items():
                 if tables:
                     print(f"\nTables in schema '{schema}':")
-                    for table in tables:
-                        print(f"  - {table}")
+                    for table, estimate in tables:
+                        # reltuples is -1 (or 0) until the table has been analyzed
+                        rows = f"~{estimate} rows" if estimate > 0 else "row estimate unavailable"
+                        print(f"  - {table} ({rows})")
                 else:
                     print(f"\nNo tables found in schema '{schema}'")
-        except Exception:
-            # Try SQLite version
+        else:
+            # SQLite fallback
             result = conn.execute(text("""
                 SELECT name FROM sqlite_master 
                 WHERE type='table' 
@@ -128,62 +198,71 @@ def get_tables(engine):
                     print(f"  - {table}")
             else:
                 print("\nNo tables found in database")
-        
-        conn.close()
     except Exception as e:
         print(f"Could not list tables: {e}")
+    finally:
+        conn.rollback()
 
-def test_permissions(engine):
-    """Test CRUD permissions on the database."""
+PERMISSION_TABLE = "andikar_permission_test"
+
+# (label, statement) pairs, run in order against a scratch table. The
+# statements are constant text with inline literals: they are sent as one
+# parameter-free batch, and nothing user-supplied is interpolated into them
+PERMISSION_CHECKS = (
+    ("CREATE TABLE", f"CREATE TABLE {PERMISSION_TABLE} (id INTEGER PRIMARY KEY, name TEXT);"),
+    ("INSERT", f"INSERT INTO {PERMISSION_TABLE} (id, name) VALUES (1, 'test');"),
+    ("UPDATE", f"UPDATE {PERMISSION_TABLE} SET name = 'updated' WHERE id = 1;"),
+    ("DELETE", f"DELETE FROM {PERMISSION_TABLE} WHERE id = 1;"),
+    ("DROP TABLE", f"DROP TABLE {PERMISSION_TABLE};"),
+)
+
+def _test_permissions_batched(conn):
+    """Send every permission check in one round-trip. Returns True if all passed."""
+    labels = ", ".join(label for label, _ in PERMISSION_CHECKS)
+    print(f"\nTesting {labels} permissions in one batch...")
     try:
-        conn = engine.connect()
-        table_name = "andikar_permission_test"
-        
-        # Test CREATE TABLE permission
-        print("\nTesting CREATE TABLE permission...")
+        # no_parameters makes the driver send the batch as a simple query,
+        # which is what allows several statements in one execute()
+        conn.exec_driver_sql(
+            " ".join(statement for _, statement in PERMISSION_CHECKS),
+            execution_options={"no_parameters": True},
+        )
+    except Exception as e:
+        print(f"Batch failed ({e}), checking statements one at a time...")
+        conn.rollback()
+        return False
+    for label, _ in PERMISSION_CHECKS:
+        print(f"✅ {label}: Permission granted")
+    return True
+
+def _test_permissions_individually(conn):
+    """Run the permission checks one by one to find the statement that fails."""
+    for label, statement in PERMISSION_CHECKS:
+        if label == "DROP TABLE":
+            print("\nCleaning up test table...")
+        else:
+            print(f"\nTesting {label} permission...")
         try:
-            conn.execute(text(f"CREATE TABLE {table_name} (id INTEGER PRIMARY KEY, name TEXT);"))
-            print("✅ CREATE TABLE: Permission granted")
+            conn.exec_driver_sql(statement)
+            print(f"✅ {label}: Permission granted")
         except Exception as e:
-            print(f"❌ CREATE TABLE: Permission denied - {e}")
-            conn.close()
+            print(f"❌ {label}: Permission denied - {e}")
+            if label == "CREATE TABLE":
+                return
+
+def test_permissions(conn):
+    """Test CRUD permissions on the database."""
+    try:
+        # PostgreSQL accepts the whole batch at once; SQLite executes one
+        # statement per call, and there is no network round-trip to save
+        if conn.dialect.name == "postgresql" and _test_permissions_batched(conn):
             return
-        
-        # Test INSERT permission
-        print("\nTesting INSERT permission...")
-        try:
-            conn.execute(text(f"INSERT INTO {table_name} (id, name) VALUES (1, 'test');"))
-            print("✅ INSERT: Permission granted")
-        except Exception as e:
-            print(f"❌ INSERT: Permission denied - {e}")
-        
-        # Test UPDATE permission
-        print("\nTesting UPDATE permission...")
-        try:
-            conn.execute(text(f"UPDATE {table_name} SET name = 'updated' WHERE id = 1;"))
-            print("✅ UPDATE: Permission granted")
-        except Exception as e:
-            print(f"❌ UPDATE: Permission denied - {e}")
-        
-        # Test DELETE permission
-        print("\nTesting DELETE permission...")
-        try:
-            conn.execute(text(f"DELETE FROM {table_name} WHERE id = 1;"))
-            print("✅ DELETE: Permission granted")
-        except Exception as e:
-            print(f"❌ DELETE: Permission denied - {e}")
-        
-        # Clean up the test table
-        print("\nCleaning up test table...")
-        try:
-            conn.execute(text(f"DROP TABLE {table_name};"))
-            print("✅ DROP TABLE: Permission granted")
-        except Exception as e:
-            print(f"❌ DROP TABLE: Permission denied - {e}")
-        
-        conn.close()
+        _test_permissions_individually(conn)
     except Exception as e:
         print(f"Could not test permissions: {e}")
+    finally:
+        # Nothing from the permission checks should persist
+        conn.rollback()
 
 def main():
     print("\n🔍 Andikar Database Diagnostic Tool 🔍")
@@ -202,83 +281,97 @@ def main():
     proxy_domain = os.getenv("RAILWAY_TCP_PROXY_DOMAIN")
     proxy_port = os.getenv("RAILWAY_TCP_PROXY_PORT")
     
-    print(f"DATABASE_URL: {mask_password(db_url)}")
-    print(f"DATABASE_PUBLIC_URL: {mask_password(db_public_url)}")
-    print(f"PGUSER: {pg_user or 'Not set'}")
-    print(f"PGDATABASE: {pg_db or 'Not set'}")
-    print(f"RAILWAY_PRIVATE_DOMAIN: {internal_domain or 'Not set'}")
-    print(f"RAILWAY_TCP_PROXY_DOMAIN: {proxy_domain or 'Not set'}")
-    print(f"RAILWAY_TCP_PROXY_PORT: {proxy_port or 'Not set'}")
+    env_vars = {
+        "DATABASE_URL": mask_password(db_url),
+        "DATABASE_PUBLIC_URL": mask_password(db_public_url),
+        "PGUSER": pg_user or "Not set",
+        "PGDATABASE": pg_db or "Not set",
+        "RAILWAY_PRIVATE_DOMAIN": internal_domain or "Not set",
+        "RAILWAY_TCP_PROXY_DOMAIN": proxy_domain or "Not set",
+        "RAILWAY_TCP_PROXY_PORT": proxy_port or "Not set",
+    }
+    # One write, so the block reaches container logs as a single record
+    sys.stdout.write("".join(f"{key}: {value}\n" for key, value in env_vars.items()))
     
-    # Check internal connectivity
-    if internal_domain:
-        internal_port = os.getenv("PGPORT", "5432")
-        print(f"\nChecking connectivity to {internal_domain}:{internal_port}...")
-        if check_connectivity(internal_domain, int(internal_port)):
-            print(f"✅ Connected to {internal_domain}:{internal_port}")
-        else:
-            print(f"Could not connect to {internal_domain}:{internal_port}")
+    # Collect every configured connection string; they are tried concurrently
+    candidates = []
+    pg_password = os.getenv("PGPASSWORD") or os.getenv("POSTGRES_PASSWORD")
     
-    # Check proxy connectivity
-    if proxy_domain and proxy_port:
-        print(f"\nChecking connectivity to {proxy_domain}:{proxy_port}...")
-        if check_connectivity(proxy_domain, int(proxy_port)):
-            print(f"✅ Connected to {proxy_domain}:{proxy_port}")
-        else:
-            print(f"Could not connect to {proxy_domain}:{proxy_port}")
-    
-    # Determine the database connection string
-    connection_string = None
-    masked_connection_string = None
-    
-    # Priority 1: Use DATABASE_URL
     if db_url:
         if db_url.startswith("postgres://"):
             db_url = db_url.replace("postgres://", "postgresql://", 1)
-        connection_string = db_url
-        masked_connection_string = mask_password(db_url)
-        print(f"\nUsing DATABASE_URL: {masked_connection_string}")
+        candidates.append(("DATABASE_URL", db_url, mask_password(db_url)))
     
-    # Priority 2: Use proxy connection
-    elif proxy_domain and proxy_port and pg_user:
-        pg_password = os.getenv("PGPASSWORD") or os.getenv("POSTGRES_PASSWORD")
-        if pg_password and pg_db:
-            connection_string = f"postgresql://{pg_user}:{pg_password}@{proxy_domain}:{proxy_port}/{pg_db}"
-            masked_connection_string = f"postgresql://{pg_user}:****@{proxy_domain}:{proxy_port}/{pg_db}"
-            print(f"\nUsing TCP proxy connection: {masked_connection_string}")
+    if proxy_domain and proxy_port and pg_user and pg_password and pg_db:
+        candidates.append((
+            "TCP proxy connection",
+            f"postgresql://{pg_user}:{quote(pg_password, safe='')}@{proxy_domain}:{proxy_port}/{pg_db}",
+            f"postgresql://{pg_user}:****@{proxy_domain}:{proxy_port}/{pg_db}",
+        ))
     
-    # Priority 3: Use internal connection
-    elif internal_domain and pg_user:
-        pg_password = os.getenv("PGPASSWORD") or os.getenv("POSTGRES_PASSWORD")
+    if internal_domain and pg_user and pg_password and pg_db:
         pg_port = os.getenv("PGPORT", "5432")
-        if pg_password and pg_db:
-            connection_string = f"postgresql://{pg_user}:{pg_password}@{internal_domain}:{pg_port}/{pg_db}"
-            masked_connection_string = f"postgresql://{pg_user}:****@{internal_domain}:{pg_port}/{pg_db}"
-            print(f"\nUsing internal connection: {masked_connection_string}")
+        candidates.append((
+            "internal connection",
+            f"postgresql://{pg_user}:{quote(pg_password, safe='')}@{internal_domain}:{pg_port}/{pg_db}",
+            f"postgresql://{pg_user}:****@{internal_domain}:{pg_port}/{pg_db}",
+        ))
     
-    if not connection_string:
+    if not candidates:
         print("\nNo PostgreSQL connection configuration found, using SQLite fallback")
-        connection_string = "sqlite:///andikar.db"
-        masked_connection_string = connection_string
+        # In-memory, so the permission checks never write to disk
+        candidates.append(("SQLite fallback", "sqlite:///:memory:", "sqlite:///:memory:"))
+    
+    # Hosts that a connection attempt below will reach anyway are not
+    # pre-probed; the rest are checked concurrently, so unreachable hosts
+    # cost one timeout in total rather than one each
+    connecting_to = {url_endpoint(conn_str) for _, conn_str, _ in candidates}
+    endpoints = []
+    if internal_domain:
+        endpoints.append((internal_domain, int(os.getenv("PGPORT", "5432"))))
+    if proxy_domain and proxy_port:
+        endpoints.append((proxy_domain, int(proxy_port)))
+    for url in (db_url, db_public_url):
+        endpoint = url_endpoint(url)
+        if endpoint and endpoint not in endpoints:
+            endpoints.append(endpoint)
+    endpoints = [endpoint for endpoint in endpoints if endpoint not in connecting_to]
+    
+    if endpoints:
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            results = list(executor.map(lambda endpoint: check_connectivity(*endpoint), endpoints))
+        for (host, port), reachable in zip(endpoints, results):
+            print(f"\nChecking connectivity to {host}:{port}...")
+            if reachable:
+                print(f"✅ Connected to {host}:{port}")
+            else:
+                print(f"Could not connect to {host}:{port}")
     
     print("\n==================================================")
     print(" DATABASE CONNECTION TEST")
     print("==================================================")
     
-    # Create the SQLAlchemy engine
     print("Connecting to database...")
+    for name, _, masked in candidates:
+        print(f"Trying {name}: {masked}")
     try:
-        engine = create_engine(connection_string)
-        if test_connection(engine, connection_string, masked_connection_string):
-            print("\n==================================================")
-            print(" DATABASE TABLES")
-            print("==================================================")
-            get_tables(engine)
-            
-            print("\n==================================================")
-            print(" DATABASE PERMISSIONS")
-            print("==================================================")
-            test_permissions(engine)
+        # One connection is shared by all checks to avoid repeated handshakes
+        conn = connect_first(candidates)
+        if conn is not None:
+            try:
+                test_connection(conn)
+                
+                print("\n==================================================")
+                print(" DATABASE TABLES")
+                print("==================================================")
+                get_tables(conn)
+                
+                print("\n==================================================")
+                print(" DATABASE PERMISSIONS")
+                print("==================================================")
+                test_permissions(conn)
+            finally:
+                conn.close()
     except Exception as e:
         print(f"Error connecting to database: {e}")
         print("Stack trace:")
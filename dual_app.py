@@ -1,8 +1,7 @@
 import logging
 import os
 import threading
-import time
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 import uvicorn
 
@@ -11,7 +10,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("dual_app")
 
 # Create a minimal app to respond while the main app is loading
-app = FastAPI()
+bootstrap_app = FastAPI()
 
 # Flag to track if the main app is ready
 is_main_app_ready = False
@@ -19,7 +18,10 @@ is_main_app_ready = False
 # Global variable to hold the main app once loaded
 main_app = None
 
-@app.get("/health")
+# ASGI app currently serving requests: bootstrap_app, then main_app once loaded
+current_app = bootstrap_app
+
+@bootstrap_app.get("/health")
 async def health_check():
     """This endpoint always responds immediately, even during startup"""
     return {
@@ -27,66 +29,55 @@ async def health_check():
         "main_app_ready": is_main_app_ready
     }
 
-@app.get("/")
+@bootstrap_app.get("/")
 async def root():
     """Root endpoint that indicates status"""
-    if is_main_app_ready:
-        return {
-            "status": "ready",
-            "name": "Andikar Backend API",
-            "version": "1.0.6"
-        }
-    else:
-        return {
-            "status": "starting",
-            "message": "Andikar Backend API is starting up, please wait..."
+    return {
+        "status": "starting",
+        "message": "Andikar Backend API is starting up, please wait..."
+    }
+
+@bootstrap_app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"])
+async def starting_up(path: str):
+    """Every other route is unavailable until the main app has loaded"""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "detail": "Service is starting up, please try again shortly"
         }
+    )
 
-@app.middleware("http")
-async def proxy_middleware(request: Request, call_next):
-    """Middleware to forward requests to main app when it's ready"""
-    # Always allow health checks and root endpoint
-    if request.url.path in ["/health", "/"]:
-        return await call_next(request)
-    
-    # If main app isn't ready, return a 503 Service Unavailable
-    if not is_main_app_ready:
-        return JSONResponse(
-            status_code=503,
-            content={
-                "detail": "Service is starting up, please try again shortly"
-            }
-        )
-    
-    # Forward to main app
-    return await main_app(request.scope, request.receive, request.send)
+@bootstrap_app.on_event("startup")
+async def start_loading_main_app():
+    """Start loading the main app in the background as soon as uvicorn starts"""
+    threading.Thread(target=load_main_app, daemon=True).start()
+
+async def app(scope, receive, send):
+    """ASGI entry point: hand the request straight to whichever app is current"""
+    await current_app(scope, receive, send)
 
 def load_main_app():
     """Load the main app in a background thread"""
-    global main_app, is_main_app_ready
+    global main_app, is_main_app_ready, current_app
     
-    # Simulate startup time
     logger.info("Starting to load main application...")
     
     try:
         # Import the main app
-        time.sleep(1)  # Brief pause to ensure minimal app is responding first
         import main
         
         # Store the reference to the main app
         main_app = main.app
         
-        # Mark as ready
+        # Mark as ready and route all further requests to the main app
         is_main_app_ready = True
+        current_app = main_app
         logger.info("Main application loaded successfully")
     except Exception as e:
         logger.error(f"Error loading main application: {e}")
 
 def run_app():
     """Run the FastAPI application with uvicorn"""
-    # Start loading the main app in a background thread
-    threading.Thread(target=load_main_app).start()
-    
     # Get port from environment variable or use default
     port = int(os.environ.get("PORT", 8080))
     
@@ -2,28 +2,48 @@
 Enhanced startup script for Andikar Backend API.
 
 This script provides a two-phase startup process:
-1. A simple FastAPI app that serves a status page while the main app is starting
+1. A minimal ASGI app that serves a status page while the main app is starting
 2. Graceful transition to the main application once initialization is complete
 
 This ensures users always get a response, even during startup/initialization.
 """
 import asyncio
+import gzip
+import hashlib
+import html
+import importlib
 import os
-import time
-import threading
+import string
 import logging
-import subprocess
 import sys
-from contextlib import asynccontextmanager
+import urllib.parse
+from typing import NamedTuple
+
+import uvicorn
+
+try:
+    # Faster JSON encoding for the pre-encoded /status body
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    import json
+    
+    def _dumps(value):
+        return json.dumps(value, separators=(",", ":")).encode()
+
+try:
+    # libuv-based event loop, used for the whole process when installed
+    import uvloop  # noqa: F401
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 try:
-    from fastapi.templating import Jinja2Templates
-    TEMPLATES_AVAILABLE = True
-except (ImportError, AssertionError):
-    TEMPLATES_AVAILABLE = False
-from fastapi.staticfiles import StaticFiles
+    # C HTTP parser; uvicorn falls back to the pure-Python h11 without it
+    import httptools  # noqa: F401
+    HTTP_IMPL = "httptools"
+except ImportError:
+    HTTP_IMPL = "h11"
 
 # Set up logging
 logging.basicConfig(
@@ -32,32 +52,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger("andikar-entrypoint")
 
-# Create directories if they don't exist
-os.makedirs("templates", exist_ok=True)
-os.makedirs("static", exist_ok=True)
-
-# Global variables
-startup_complete = False
-startup_progress = 0
-startup_status = "initializing"
-startup_message = "Andikar Backend API is starting up..."
-
-# Create a simple startup app
-startup_app = FastAPI(
-    title="Andikar Backend API Startup",
-    description="Starting up Andikar Backend API",
-    version="1.0.0"
-)
-
-# Set up templates if available
-if TEMPLATES_AVAILABLE:
-    templates = Jinja2Templates(directory="templates")
+def _minify_html(markup):
+    """Strip indentation and blank lines; line breaks are kept so inline JS stays valid."""
+    return "\n".join(line.strip() for line in markup.splitlines() if line.strip())
 
-    # Create status page HTML template if it doesn't exist
-    status_template_path = os.path.join("templates", "status.html")
-    if not os.path.exists(status_template_path):
-        with open(status_template_path, "w") as f:
-            f.write("""<!DOCTYPE html>
+# Status page shown while the main application starts; $progress, $status
+# and $message are substituted (HTML-escaped) per state. Minified once here
+STATUS_HTML_TEMPLATE = string.Template(_minify_html("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -65,7 +66,6 @@ if TEMPLATES_AVAILABLE:
     <title>Andikar Backend API - Starting Up</title>
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
-    <meta http-equiv="refresh" content="5">
     <style>
         body {
             background-color: #f8f9fa;
@@ -118,108 +118,280 @@ if TEMPLATES_AVAILABLE:
         </div>
         
         <div class="progress">
-            <div class="progress-bar progress-bar-striped progress-bar-animated" 
+            <div id="progress-bar" class="progress-bar progress-bar-striped progress-bar-animated" 
                 role="progressbar" 
-                style="width: {{ progress }}%;" 
-                aria-valuenow="{{ progress }}" 
+                style="width: $progress%;" 
+                aria-valuenow="$progress" 
                 aria-valuemin="0" 
                 aria-valuemax="100">
-                {{ progress }}%
+                $progress%
             </div>
         </div>
         
         <div class="status-message">
-            <strong>Status:</strong> {{ status }}
-            <p>{{ message }}</p>
+            <strong>Status:</strong> <span id="status">$status</span>
+            <p id="message">$message</p>
         </div>
         
         <div class="footer">
-            <p>This page will automatically refresh every 5 seconds</p>
+            <p>This page updates automatically</p>
             <p>© 2025 Andikar. All rights reserved.</p>
         </div>
     </div>
+    <script>
+        // /status/stream pushes one event per progress change
+        (function () {
+            var bar = document.getElementById("progress-bar");
+            var source = new EventSource("/status/stream");
+            source.onmessage = function (event) {
+                var data = JSON.parse(event.data);
+                if (data.complete || data.progress >= 100) {
+                    source.close();
+                    window.location.reload();
+                    return;
+                }
+                bar.style.width = data.progress + "%";
+                bar.setAttribute("aria-valuenow", data.progress);
+                bar.textContent = data.progress + "%";
+                document.getElementById("status").textContent = data.stage;
+                document.getElementById("message").textContent = data.message;
+                if (data.stage === "error") {
+                    source.close();
+                }
+            };
+        })();
+    </script>
 </body>
-</html>""")
+</html>"""))
 
-# Mount static files
-try:
-    startup_app.mount("/static", StaticFiles(directory="static"), name="static")
-except Exception as e:
-    logger.warning(f"Could not mount static files: {str(e)}")
-
-# Status page route
-@startup_app.get("/", response_class=HTMLResponse)
-async def status_page(request: Request):
-    if TEMPLATES_AVAILABLE:
-        return templates.TemplateResponse("status.html", {
-            "request": request,
-            "progress": startup_progress,
-            "status": startup_status,
-            "message": startup_message
-        })
-    else:
-        # Fallback HTML if templates not available
-        html_content = f"""
-        <html>
-            <head>
-                <title>Andikar Backend API - Starting Up</title>
-                <meta http-equiv="refresh" content="5">
-            </head>
-            <body>
-                <h1>Andikar Backend API</h1>
-                <p>Status: {startup_status}</p>
-                <p>Progress: {startup_progress}%</p>
-                <p>{startup_message}</p>
-                <p>This page will automatically refresh every 5 seconds</p>
-            </body>
-        </html>
-        """
-        return HTMLResponse(content=html_content)
-
-# Status API route - REQUIRED FOR RAILWAY HEALTH CHECK
-@startup_app.get("/status")
-async def status_api():
-    return {
+class StartupState(NamedTuple):
+    """One consistent snapshot of the startup progress.
+    
+    The ETags, the /status body and the status page (plain and gzipped) are
+    encoded once per state, in _make_state(), rather than on every request.
+    The gzipped page has its own ETag so caches never mix up the two encodings.
+    """
+    status: str
+    message: str
+    progress: int
+    complete: bool
+    etag: bytes
+    status_json: bytes
+    page: bytes
+    page_gzip: bytes
+    etag_gzip: bytes
+
+def _make_state(status, message, progress, complete=False):
+    """Build a StartupState with its responses pre-encoded."""
+    digest = hashlib.md5(repr((status, message, progress, complete)).encode()).hexdigest()
+    etag = '"' + digest + '"'
+    status_json = _dumps({
         "status": "healthy",  # Always report healthy to prevent Railway from restarting container
-        "progress": startup_progress,
-        "message": startup_message,
-        "complete": startup_complete
-    }
-
-# Health endpoint with detailed status
-@startup_app.get("/health")
-async def health_check():
-    """Provide detailed health status information."""
-    return {
-        "status": "healthy" if startup_status != "error" else "unhealthy",
-        "progress": startup_progress,
-        "message": startup_message,
+        "stage": status,
+        "progress": progress,
+        "message": message,
+        "complete": complete
+    })
+    page = STATUS_HTML_TEMPLATE.substitute(
+        progress=progress,
+        status=html.escape(status),
+        message=html.escape(message)
+    ).encode()
+    return StartupState(status, message, progress, complete, etag.encode(), status_json,
+                        page, gzip.compress(page), ('"' + digest + '-gzip"').encode())
+
+# Current startup state. It is only ever replaced as a whole (a single,
+# atomic global assignment), so handlers never see a mix of old and new fields
+startup_state = _make_state("initializing", "Andikar Backend API is starting up...", 0)
+
+# Module whose `app` is served once startup completes
+MAIN_MODULE = os.getenv("ANDIKAR_MAIN_MODULE", "app")
+
+# /status/stream waits on this event, which update_startup_progress()
+# sets (and replaces) on every change
+_progress_event = asyncio.Event()
+_event_loop = None
+
+# Seconds between keepalive comments on an idle /status/stream
+SSE_KEEPALIVE_INTERVAL = 25
+
+def _notify_progress():
+    """Wake every open /status/stream; runs on the event loop."""
+    global _progress_event
+    event = _progress_event
+    _progress_event = asyncio.Event()
+    event.set()
+
+def _health_json(state):
+    """Detailed health status for /health."""
+    return _dumps({
+        "status": "healthy" if state.status != "error" else "unhealthy",
+        "progress": state.progress,
+        "message": state.message,
         "services": {
-            "api": "starting" if not startup_complete else "running",
+            "api": "starting" if not state.complete else "running",
             "database": "initializing"
         }
-    }
-
-# All other routes redirect to status page during startup
-@startup_app.get("/{path:path}")
-async def catch_all(path: str):
-    # Exclude status endpoint from redirection
-    if path == "status":
-        return await status_api()
-    if path == "health":
-        return await health_check()
-    return RedirectResponse(url="/")
-
-def update_startup_progress(status, message, progress):
-    global startup_status, startup_message, startup_progress
-    startup_status = status
-    startup_message = message
-    startup_progress = progress
-    logger.info(f"Startup progress: {progress}% - {status}: {message}")
-
-def run_main_app():
-    global startup_complete, startup_status, startup_message, startup_progress
+    })
+
+async def _send(send, status, body=b"", headers=()):
+    """Send a complete HTTP response."""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _wait_for_disconnect(receive):
+    """Return once the client has gone away."""
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+async def _stream_status(receive, send):
+    """Server-sent events: one /status body per progress change.
+    
+    The stream ends once startup completes or fails; in between, a comment
+    line every SSE_KEEPALIVE_INTERVAL seconds keeps proxies from closing it.
+    """
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+    })
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        sent = None
+        while True:
+            event = _progress_event
+            state = startup_state
+            if state.etag != sent:
+                await send({"type": "http.response.body", "body": b"data: " + state.status_json + b"\n\n", "more_body": True})
+                sent = state.etag
+            if state.complete or state.status == "error":
+                break
+            changed = asyncio.ensure_future(event.wait())
+            done, _ = await asyncio.wait({changed, disconnected}, timeout=SSE_KEEPALIVE_INTERVAL,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            changed.cancel()
+            if disconnected in done:
+                return
+            if not done:
+                await send({"type": "http.response.body", "body": b": keepalive\n\n", "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        disconnected.cancel()
+
+async def startup_app(scope, receive, send):
+    """Minimal ASGI app serving the status page, /status and /health during startup."""
+    if scope["type"] != "http":
+        return
+    
+    path = scope["path"]
+    request_headers = dict(scope["headers"])
+    no_cache = (b"cache-control", b"no-cache")
+    
+    if path == "/status/stream":
+        await _stream_status(receive, send)
+        return
+    
+    # Status API route - REQUIRED FOR RAILWAY HEALTH CHECK
+    if path == "/status":
+        state = startup_state
+        if request_headers.get(b"if-none-match") == state.etag:
+            await _send(send, 304, headers=[(b"etag", state.etag)])
+            return
+        await _send(send, 200, state.status_json, [
+            (b"content-type", b"application/json"), (b"etag", state.etag), no_cache,
+        ])
+        return
+    
+    state = startup_state
+    if path == "/health":
+        status = 503 if state.status == "error" else 200
+        await _send(send, status, _health_json(state), [(b"content-type", b"application/json")])
+        return
+    if path == "/favicon.ico":
+        # Browsers fetch this on their own; answer without sending the status page
+        await _send(send, 204)
+        return
     
+    # The root serves the status page; every other path gets it directly
+    # too, marked as temporarily unavailable
+    headers = [(b"content-type", b"text/html; charset=utf-8"), no_cache, (b"vary", b"accept-encoding")]
+    if b"gzip" in request_headers.get(b"accept-encoding", b""):
+        headers.append((b"content-encoding", b"gzip"))
+        body, etag = state.page_gzip, state.etag_gzip
+    else:
+        body, etag = state.page, state.etag
+    if path == "/":
+        status = 200
+        if request_headers.get(b"if-none-match") == etag:
+            await _send(send, 304, headers=[(b"etag", etag), (b"vary", b"accept-encoding")])
+            return
+        headers.append((b"etag", etag))
+    else:
+        status = 503
+        headers.append((b"retry-after", b"5"))
+    await _send(send, status, body, headers)
+
+def update_startup_progress(status, message, progress, complete=False):
+    global startup_state
+    startup_state = _make_state(status, message, progress, complete)
+    logger.info("Startup progress: %d%% - %s: %s", progress, status, message)
+    if _event_loop is not None:
+        _event_loop.call_soon_threadsafe(_notify_progress)
+
+def _import_main_app():
+    """Import and return the main FastAPI app (blocking; run in a worker thread)."""
+    try:
+        main_app = importlib.import_module(MAIN_MODULE).app
+    except ImportError as e:
+        logger.error("Could not import main app from '%s': %s", MAIN_MODULE, e)
+        raise
+    _mount_health_check(main_app)
+    return main_app
+
+def _mount_health_check(main_app):
+    """Serve health_check.py's app under /health-svc in this process."""
+    try:
+        health_check = importlib.import_module("health_check")
+        main_app.mount("/health-svc", health_check.app)
+        logger.info("Health check service mounted at /health-svc")
+    except Exception as e:
+        logger.warning("Could not mount health check service: %s", e)
+
+async def _init_database():
+    """Wait for the database and run init_db, reporting progress.
+    
+    An unreachable database is fatal (see run_main_app); a failed init_db
+    is reported and startup carries on with limited features.
+    """
+    update_startup_progress("importing", "Importing database modules...", 20)
+    database = await asyncio.to_thread(importlib.import_module, "database")
+    
+    # Wait on the event loop (async ping with backoff); raises RuntimeError
+    # once the retry budget is exhausted
+    update_startup_progress("db_wait", "Waiting for database...", 25)
+    await database.ensure_db_ready()
+    update_startup_progress("db_connect", "Connected to database, initializing...", 30)
+    
+    if await asyncio.to_thread(database.init_db):
+        update_startup_progress("db_ready", "Database initialization successful!", 50)
+    else:
+        update_startup_progress("db_partial", "Database initialization partially successful", 40)
+
+async def run_main_app(state=None):
+    """Initialize the database, load and start the main app, then switch `app` over to it.
+    
+    The database is brought up here for every main module; app.py's own
+    startup handler sees database.is_initialized() and skips it. On failure
+    the error is recorded in startup_state and the server exits with status
+    1 so the platform restarts the container. Blocking steps (imports,
+    init_db) run in worker threads so requests keep being answered on this
+    event loop.
+    """
+    global _served_app, _main_lifespan
     try:
         # Update status to database check
         update_startup_progress("connecting", "Connecting to database...", 10)
@@ -235,148 +407,150 @@ def run_main_app():
             proxy_port = os.getenv("RAILWAY_TCP_PROXY_PORT")
             
             if pgpassword and proxy_domain and proxy_port:
-                # Password encode
-                import urllib.parse
-                encoded_password = urllib.parse.quote_plus(pgpassword)
+                # Percent-encode the password (quote_plus's "+" for spaces is
+                # not decoded by make_url or libpq)
+                encoded_password = urllib.parse.quote(pgpassword, safe="")
                 
                 # Set DATABASE_URL
                 db_url = f"postgresql://{pguser}:{encoded_password}@{proxy_domain}:{proxy_port}/{pgdatabase}"
                 os.environ["DATABASE_URL"] = db_url
-                logger.info(f"Set DATABASE_URL to: postgresql://{pguser}:****@{proxy_domain}:{proxy_port}/{pgdatabase}")
+                logger.info("Set DATABASE_URL to: postgresql://%s:****@%s:%s/%s", pguser, proxy_domain, proxy_port, pgdatabase)
             else:
                 logger.warning("Could not construct DATABASE_URL, missing required components")
         
-        # Try to import database modules
-        update_startup_progress("importing", "Importing database modules...", 20)
-        try:
-            from database import Base, engine, init_db
-            update_startup_progress("db_connect", "Connected to database, initializing...", 30)
-            
-            # Initialize database
-            result = init_db()
-            if result:
-                update_startup_progress("db_ready", "Database initialization successful!", 50)
-            else:
-                update_startup_progress("db_partial", "Database initialization partially successful", 40)
-        except Exception as e:
-            logger.error(f"Database initialization error: {str(e)}")
-            update_startup_progress("db_error", f"Database error: {str(e)}", 30)
-        
-        # Update status to loading routes
-        update_startup_progress("loading", "Loading application components...", 60)
-        time.sleep(1)  # Small delay
-        
-        # Update status to starting health check
-        update_startup_progress("health_check", "Starting health check service...", 70)
-        
-        # Start health check service
+        # The database and the main app's import do not depend on each
+        # other, so they run concurrently
+        db_task = asyncio.create_task(_init_database())
         try:
-            # Start health_check.py in background process
-            health_port = os.getenv("HEALTH_PORT", "8081")
-            subprocess.Popen([sys.executable, "health_check.py", "--port", health_port], 
-                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            logger.info(f"Health check service started on port {health_port}")
-        except Exception as e:
-            logger.warning(f"Could not start health check service: {str(e)}")
+            main_app = await asyncio.to_thread(_import_main_app)
+        finally:
+            # Let the database step settle first so its progress updates
+            # cannot overwrite an error reported below
+            await db_task
         
-        # Update status to finishing up
-        update_startup_progress("finishing", "Finishing startup process...", 90)
+        # Run the main app's startup handlers, then route requests to it
+        update_startup_progress("starting", "Starting main application...", 90)
+        lifespan = _AppLifespan(main_app, state)
+        await lifespan.startup()
+        _main_lifespan = lifespan
+        _served_app = main_app
         
-        try:
-            # First try to import app from main
-            from app import app as main_app
-            
-            # Mark startup as complete
-            update_startup_progress("complete", "Startup complete! Running main application.", 100)
-            startup_complete = True
-            
-            # Run the main app using Uvicorn
-            import uvicorn
-            port = int(os.getenv("PORT", "8080"))
-            uvicorn.run(main_app, host="0.0.0.0", port=port)
-            
-        except ImportError:
-            # Try to import app from app.py
-            logger.info("Trying alternative import path for main app")
-            
-            try:
-                import app
-                update_startup_progress("complete", "Startup complete! Running main application.", 100)
-                startup_complete = True
-                
-                # Run the main app using Uvicorn
-                import uvicorn
-                port = int(os.getenv("PORT", "8080"))
-                uvicorn.run(app.app, host="0.0.0.0", port=port)
-                
-            except ImportError as e:
-                logger.error(f"Could not import main app: {str(e)}")
-                raise
+        # Mark startup as complete
+        update_startup_progress("complete", "Startup complete! Running main application.", 100, complete=True)
         
     except Exception as e:
         # Log the error
-        logger.error(f"Error starting main app: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.error("Error starting main app: %s", e, exc_info=True)
+        error = str(e)
         
         # Update status to error
-        update_startup_progress("error", f"Error starting application: {str(e)}", 0)
-        
-        # Create a simple FastAPI app as fallback
-        fallback_app = FastAPI(
-            title="Andikar API (Limited Mode)",
-            description="Running in limited mode due to startup error",
-            version="1.0.0"
-        )
-        
-        @fallback_app.get("/")
-        async def fallback_root():
-            return {
-                "status": "error", 
-                "message": "The application encountered an error during startup",
-                "error": str(e)
-            }
-        
-        @fallback_app.get("/health")
-        async def fallback_health():
-            return {
-                "status": "unhealthy",
-                "error": str(e),
-                "timestamp": time.time()
-            }
-        
-        @fallback_app.get("/status")
-        async def fallback_status():
-            return {
-                "status": "healthy",  # Always report healthy to Railway
-                "message": "Limited functionality available",
-                "timestamp": time.time()
-            }
+        update_startup_progress("error", f"Error starting application: {error}", 0)
         
-        # Run the fallback app
-        import uvicorn
-        port = int(os.getenv("PORT", "8080"))
-        uvicorn.run(fallback_app, host="0.0.0.0", port=port)
+        # /status reports healthy, so Railway would never restart a container
+        # stuck here; exit non-zero instead (restartPolicyType ON_FAILURE)
+        _stop_server(exit_code=1)
+
+class _AppLifespan:
+    """Drive an ASGI app's lifespan protocol on behalf of the server."""
+    
+    def __init__(self, main_app, state):
+        self._app = main_app
+        # Share the server's lifespan state so it reaches the app's requests
+        self._scope = {
+            "type": "lifespan",
+            "asgi": {"version": "3.0", "spec_version": "2.0"},
+            "state": state if state is not None else {},
+        }
+        self._receive = asyncio.Queue()
+        self._send = asyncio.Queue()
+        self._task = None
+    
+    async def _call(self, message_type):
+        await self._receive.put({"type": message_type})
+        reply = asyncio.ensure_future(self._send.get())
+        await asyncio.wait({reply, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            # The app returned (or raised) without answering
+            reply.cancel()
+            self._task.result()
+            return
+        message = reply.result()
+        if message["type"].endswith(".failed"):
+            # Starlette re-raises the original error right after reporting
+            # the failure (with a full traceback as the message); prefer it
+            await asyncio.wait({self._task}, timeout=1)
+            if self._task.done() and not self._task.cancelled() and self._task.exception() is not None:
+                raise self._task.exception()
+            raise RuntimeError(message.get("message") or message["type"])
+    
+    async def startup(self):
+        self._task = asyncio.create_task(self._app(self._scope, self._receive.get, self._send.put))
+        await self._call("lifespan.startup")
+    
+    async def shutdown(self):
+        if not self._task.done():
+            await self._call("lifespan.shutdown")
+
+# The app requests are routed to; run_main_app() replaces it once ready
+_served_app = startup_app
+_main_lifespan = None
+
+# The running uvicorn server (set in __main__) and the process exit status
+_server = None
+_exit_code = 0
+
+def _stop_server(exit_code):
+    """Shut the server down gracefully and exit the process with exit_code."""
+    global _exit_code
+    _exit_code = exit_code
+    if _server is not None:
+        _server.should_exit = True
+
+async def _lifespan(scope, receive, send):
+    """Load the main app in the background for as long as the server runs."""
+    global _event_loop
+    loader = None
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            _event_loop = asyncio.get_running_loop()
+            loader = asyncio.create_task(run_main_app(scope.get("state")))
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if loader is not None:
+                loader.cancel()
+            if _main_lifespan is not None:
+                await _main_lifespan.shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    """The single ASGI app served on PORT.
+    
+    Requests go to startup_app until run_main_app() has loaded and started
+    the main app, then to the main app, without restarting the server.
+    """
+    if scope["type"] == "lifespan":
+        await _lifespan(scope, receive, send)
+        return
+    await _served_app(scope, receive, send)
 
 # Main entry point
 if __name__ == "__main__":
     # Immediately ensure we have a /status endpoint to keep Railway happy
     update_startup_progress("initializing", "Starting initialization process...", 5)
     
-    # Start the main app in a separate thread
-    main_app_thread = threading.Thread(target=run_main_app)
-    main_app_thread.daemon = True  # Make thread a daemon so it exits when main thread exits
-    main_app_thread.start()
-    
-    # Run the startup app 
-    import uvicorn
     port = int(os.getenv("PORT", "8080"))
-    logger.info(f"Starting Andikar API on port {port}")
+    logger.info("Starting Andikar API on port %d", port)
     
+    _server = uvicorn.Server(uvicorn.Config(
+        app, host="0.0.0.0", port=port, http=HTTP_IMPL,
+        loop="uvloop" if UVLOOP_AVAILABLE else "asyncio"
+    ))
     try:
-        # Run starter app which provides the /status endpoint
-        uvicorn.run(startup_app, host="0.0.0.0", port=port)
+        _server.run()
     except Exception as e:
         # If startup app fails, log the error and exit
-        logger.error(f"Error running startup app: {str(e)}")
+        logger.error("Error running startup app: %s", e)
         sys.exit(1)
+    sys.exit(_exit_code)
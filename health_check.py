@@ -7,7 +7,6 @@ Railway uses the /status endpoint to determine if the service is healthy.
 """
 
 import os
-import sys
 import logging
 from fastapi import FastAPI, Depends
 from sqlalchemy.orm import Session
@@ -19,15 +18,27 @@ logger = logging.getLogger("health-check")
 
 try:
     # Import database utils
-    from database import get_db, engine
+    from database import get_db, get_async_db, engine, AsyncSession, AsyncSessionLocal
     from models import Base
-except ImportError as e:
+except (ImportError, RuntimeError) as e:
+    # database raises RuntimeError at import when no database is configured
     logger.error(f"Error importing database modules: {e}")
     logger.error("Health check will run with limited functionality")
     get_db = None
+    get_async_db = None
     engine = None
+    AsyncSession = None
+    AsyncSessionLocal = None
     Base = None
 
+# Prefer the async session so the database probe doesn't block the event loop
+db_dependency = get_async_db if AsyncSessionLocal is not None else get_db
+
+if db_dependency is None:
+    def db_dependency():
+        """Limited mode: no database session to inject."""
+        return None
+
 # Create FastAPI app
 app = FastAPI(
     title="Andikar Health Check",
@@ -44,7 +55,7 @@ async def status():
     }
 
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db) if get_db else None):
+async def health_check(db: Session = Depends(db_dependency)):
     """Detailed health check endpoint providing system status."""
     # Basic service check
     status_info = {
@@ -55,7 +66,10 @@ async def health_check(db: Session = Depends(get_db) if get_db else None):
     # Database check
     if db is not None:
         try:
-            db.execute(text("SELECT 1"))
+            if AsyncSession is not None and isinstance(db, AsyncSession):
+                await db.execute(text("SELECT 1"))
+            else:
+                db.execute(text("SELECT 1"))
             status_info["database"] = "healthy"
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
@@ -5,11 +5,10 @@ Run this script directly to force table creation and seeding.
 """
 import os
 import sys
+import functools
 import logging
 import time
-import uuid
-from datetime import datetime
-from passlib.context import CryptContext
+import traceback
 
 # Configure logging
 logging.basicConfig(
@@ -21,29 +20,36 @@ logger = logging.getLogger("db-init")
 # Import SQLAlchemy components
 try:
     from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import URL, make_url
+    from sqlalchemy.exc import OperationalError
+    from _db_internal import (
+        PLAN_ROWS,
+        create_missing_tables,
+        insert_ignoring_conflicts,
+        json_engine_options,
+        mask_database_url,
+        normalize_database_url,
+        resolve_seed_password_hash,
+    )
     from sqlalchemy.orm import sessionmaker
-    from sqlalchemy.ext.declarative import declarative_base
 except ImportError:
     logger.error("SQLAlchemy not installed. Please run: pip install sqlalchemy")
     sys.exit(1)
 
+@functools.lru_cache(maxsize=1)
 def get_database_url():
     """Determine the appropriate database URL to use."""
     # Option 1: Use fully formed DATABASE_URL from environment
     database_url = os.getenv("DATABASE_URL")
     if database_url:
-        if "postgres:" in database_url:
-            database_url = database_url.replace("postgres:", "postgresql:")
-        logger.info(f"Using DATABASE_URL from environment variable")
-        return database_url
+        logger.info("Using DATABASE_URL from environment variable")
+        return normalize_database_url(database_url)
 
     # Option 2: Use DATABASE_PUBLIC_URL
     database_public_url = os.getenv("DATABASE_PUBLIC_URL")
     if database_public_url:
-        if "postgres:" in database_public_url:
-            database_public_url = database_public_url.replace("postgres:", "postgresql:")
-        logger.info(f"Using DATABASE_PUBLIC_URL from environment variable")
-        return database_public_url
+        logger.info("Using DATABASE_PUBLIC_URL from environment variable")
+        return normalize_database_url(database_public_url)
 
     # Option 3: Construct from components
     pg_host = os.getenv("RAILWAY_PRIVATE_DOMAIN") or os.getenv("RAILWAY_TCP_PROXY_DOMAIN")
@@ -53,118 +59,89 @@ def get_database_url():
     pg_db = os.getenv("PGDATABASE", "railway")
     
     if pg_host:
-        database_url = f"postgresql://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_db}"
-        logger.info(f"Using constructed PostgreSQL connection URL")
-        return database_url
+        logger.info("Using constructed PostgreSQL connection URL")
+        return URL.create(
+            "postgresql",
+            username=pg_user,
+            password=pg_pass,
+            host=pg_host,
+            port=int(pg_port),
+            database=pg_db,
+        )
 
-    # Fallback to SQLite
+    # Fallback to SQLite, for local development only
+    if os.getenv("ALLOW_SQLITE_FALLBACK") != "1":
+        raise RuntimeError("No PostgreSQL connection details found")
     logger.warning("No PostgreSQL connection details found. Using SQLite.")
-    return "sqlite:///./andikar.db"
+    return make_url("sqlite:///./andikar.db")
 
 def create_engine_and_session(db_url):
     """Create a database engine and session factory."""
-    logger.info(f"Creating database engine for: {db_url.split('@')[0]}@...")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Creating database engine for: %s", mask_database_url(db_url))
     
     # Create engine with appropriate configuration
-    if db_url.startswith("sqlite"):
-        engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    if db_url.get_backend_name() == "sqlite":
+        engine = create_engine(db_url, connect_args={"check_same_thread": False}, **json_engine_options())
     else:
+        engine = create_engine(
+            db_url,
+            pool_size=5,
+            max_overflow=10,
+            pool_timeout=30,
+            connect_args={"connect_timeout": 10},
+            **json_engine_options()
+        )
         for attempt in range(5):
             try:
-                engine = create_engine(
-                    db_url,
-                    pool_size=5,
-                    max_overflow=10,
-                    pool_timeout=30,
-                    connect_args={"connect_timeout": 10}
-                )
-                
                 # Test connection
                 with engine.connect() as conn:
                     conn.execute(text("SELECT 1"))
                     logger.info("Database connection successful")
                     break
-            except Exception as e:
-                logger.warning(f"Database connection attempt {attempt+1}/5 failed: {e}")
+            except OperationalError as e:
+                # Only connection failures are worth retrying
+                logger.warning("Database connection attempt %s/5 failed: %s", attempt+1, e)
                 if attempt < 4:
                     sleep_time = 2 ** attempt
-                    logger.info(f"Retrying in {sleep_time} seconds...")
+                    logger.info("Retrying in %s seconds...", sleep_time)
                     time.sleep(sleep_time)
                 else:
                     logger.error("All connection attempts failed")
                     raise
     
     # Create session class
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
     
     return engine, SessionLocal
 
 def create_tables(engine):
     """Create all database tables."""
-    # Create a Base instance
-    Base = declarative_base()
-    
-    # Import models to register them with Base
-    from models import User, Transaction, APILog, RateLimit, PricingPlan, Webhook, UsageStat
+    # Import models to register them with the shared Base
+    from db_base import Base
+    import models  # noqa: F401
     
-    # Create all tables
+    # Create the tables that are missing
     logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Tables created successfully")
+    with engine.begin() as conn:
+        created = create_missing_tables(Base.metadata, conn)
+    logger.info("Tables created successfully (%d new)", len(created))
     
     # Return Base for seed data functions
     return Base
 
 def seed_pricing_plans(session):
-    """Seed pricing plan data in the database."""
+    """Seed the shared default pricing plans (PLAN_ROWS) in the database."""
     from models import PricingPlan
     
-    logger.info("Checking for existing pricing plans...")
-    existing_plans = session.query(PricingPlan).count()
-    
-    if existing_plans > 0:
-        logger.info(f"Found {existing_plans} existing pricing plans, skipping seeding")
-        return
-    
     logger.info("Seeding pricing plans...")
     
-    # Create free plan
-    free_plan = PricingPlan(
-        id="free",
-        name="Free",
-        description="Basic access to the API",
-        price=0.0,
-        word_limit=1000,
-        requests_per_day=10,
-        features=["Basic text humanization", "Limited requests"]
-    )
-    
-    # Create standard plan
-    standard_plan = PricingPlan(
-        id="standard",
-        name="Standard",
-        description="Standard access with higher limits",
-        price=9.99,
-        currency="KES",
-        word_limit=10000,
-        requests_per_day=100,
-        features=["Full text humanization", "AI detection", "Higher word limits"]
+    # One multi-row INSERT; plans that already exist are left untouched,
+    # so concurrent runs cannot race on a check-then-insert
+    session.execute(
+        insert_ignoring_conflicts(PricingPlan, session.get_bind()),
+        [dict(row) for row in PLAN_ROWS],
     )
-    
-    # Create premium plan
-    premium_plan = PricingPlan(
-        id="premium",
-        name="Premium", 
-        description="Premium access with highest limits",
-        price=29.99,
-        currency="KES",
-        word_limit=100000,
-        requests_per_day=1000,
-        features=["Priority processing", "Advanced humanization", "Unlimited detections", "Technical support"]
-    )
-    
-    # Add plans to session
-    session.add_all([free_plan, standard_plan, premium_plan])
     session.commit()
     
     logger.info("Pricing plans seeded successfully")
@@ -175,30 +152,35 @@ def create_admin_user(session):
     
     admin_username = os.getenv("ADMIN_USERNAME", "admin")
     
-    logger.info(f"Checking for existing admin user '{admin_username}'...")
-    existing_admin = session.query(User).filter(User.username == admin_username).first()
+    logger.info("Checking for existing admin user '%s'...", admin_username)
+    # Only the id is needed to know the admin exists
+    existing_admin_id = session.query(User.id).filter(User.username == admin_username).scalar()
     
-    if existing_admin:
-        logger.info(f"Admin user '{admin_username}' already exists, skipping creation")
+    if existing_admin_id is not None:
+        logger.info("Admin user '%s' already exists, skipping creation", admin_username)
         return
     
-    logger.info(f"Creating admin user '{admin_username}'...")
+    logger.info("Creating admin user '%s'...", admin_username)
     
-    # Generate password hash
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    admin_password = os.getenv("ADMIN_PASSWORD", "adminpassword")
-    hashed_password = pwd_context.hash(admin_password)
+    # End the read transaction so the connection is not held while bcrypt runs
+    session.commit()
+    
+    # Use a pre-computed hash when given, skipping bcrypt entirely
+    hashed_password = resolve_seed_password_hash(
+        os.getenv("ADMIN_PASSWORD", "adminpassword"),
+        os.getenv("ADMIN_PASSWORD_HASH"),
+        int(os.getenv("BCRYPT_ROUNDS", "10")),
+    )
     
     # Create admin user
+    # id and joined_date come from the model's column defaults
     admin_user = User(
-        id=str(uuid.uuid4()),
         username=admin_username,
         email=os.getenv("ADMIN_EMAIL", "admin@example.com"),
         full_name="Administrator",
         hashed_password=hashed_password,
-        plan_id="premium",
+        plan_id="pro",
         payment_status="Paid",
-        joined_date=datetime.utcnow(),
         is_active=True
     )
     
@@ -206,7 +188,7 @@ def create_admin_user(session):
     session.add(admin_user)
     session.commit()
     
-    logger.info(f"Admin user '{admin_username}' created successfully")
+    logger.info("Admin user '%s' created successfully", admin_username)
 
 def main():
     """Main initialization function."""
@@ -241,8 +223,7 @@ def main():
             session.close()
             
     except Exception as e:
-        logger.error(f"Database initialization failed: {e}")
-        import traceback
+        logger.error("Database initialization failed: %s", e)
         traceback.print_exc()
         print("\n❌ Database initialization failed.")
         sys.exit(1)
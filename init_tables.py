@@ -7,6 +7,7 @@ import psycopg2
 import logging
 import sys
 import time
+from urllib.parse import quote
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -118,19 +119,23 @@ TABLE_DEFINITIONS = [
     """
 ]
 
-def check_connectivity(host, port, timeout=3):
-    """Check if a host is reachable on the given port."""
-    import socket
+# Bump whenever TABLE_DEFINITIONS changes so existing databases pick up the new DDL
+CURRENT_SCHEMA_VERSION = 1
+
+SCHEMA_MIGRATIONS_DEFINITION = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def get_schema_version(cursor):
+    """Return the highest applied schema version, or 0 for a fresh database."""
     try:
-        socket.setdefaulttimeout(timeout)
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.connect((host, int(port)))
-        s.close()
-        logger.info(f"✅ Host {host}:{port} is reachable")
-        return True
-    except Exception as e:
-        logger.warning(f"Host {host}:{port} is not reachable: {str(e)}")
-        return False
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        return cursor.fetchone()[0]
+    except psycopg2.errors.UndefinedTable:
+        return 0
 
 def get_connection_string():
     """Get the database connection string from environment variables.
@@ -155,44 +160,59 @@ def get_connection_string():
 
     # Priority 2: Try proxy connection (most reliable in Railway)
     if proxy_domain and proxy_port:
-        logger.info(f"Using TCP proxy connection: postgresql://{pg_user}:****@{proxy_domain}:{proxy_port}/{pg_db}")
-        return f"postgresql://{pg_user}:{pg_password}@{proxy_domain}:{proxy_port}/{pg_db}"
+        logger.info("Using TCP proxy connection: postgresql://%s:****@%s:%s/%s", pg_user, proxy_domain, proxy_port, pg_db)
+        return f"postgresql://{pg_user}:{quote(pg_password, safe='')}@{proxy_domain}:{proxy_port}/{pg_db}"
     
     # Priority 3: Try direct internal connection
-    logger.info(f"Using direct connection: postgresql://{pg_user}:****@{pg_host}:{pg_port}/{pg_db}")
-    return f"postgresql://{pg_user}:{pg_password}@{pg_host}:{pg_port}/{pg_db}"
+    logger.info("Using direct connection: postgresql://%s:****@%s:%s/%s", pg_user, pg_host, pg_port, pg_db)
+    return f"postgresql://{pg_user}:{quote(pg_password, safe='')}@{pg_host}:{pg_port}/{pg_db}"
 
 def create_tables():
     """Create all tables in the database."""
     connection_string = get_connection_string()
-    logger.info(f"Connecting to database...")
+    logger.info("Connecting to database...")
     
     max_attempts = 5
     for attempt in range(max_attempts):
         try:
             # Connect to the database
-            logger.info(f"Connection attempt {attempt+1}/{max_attempts}")
-            conn = psycopg2.connect(connection_string, connect_timeout=15)
+            logger.info("Connection attempt %s/%s", attempt+1, max_attempts)
+            conn = psycopg2.connect(connection_string, connect_timeout=3)
             conn.autocommit = True
             cursor = conn.cursor()
             
-            # Create each table
+            # Skip the DDL entirely when the schema is already current
+            schema_version = get_schema_version(cursor)
+            if schema_version >= CURRENT_SCHEMA_VERSION:
+                logger.info("Schema is at version %s, skipping table creation", schema_version)
+                cursor.close()
+                conn.close()
+                return True
+            
+            # Create every table in a single round-trip
             for table_def in TABLE_DEFINITIONS:
                 table_name = table_def.split('CREATE TABLE IF NOT EXISTS')[1].split('(')[0].strip()
-                logger.info(f"Creating table: {table_name}")
-                cursor.execute(table_def)
+                logger.info("Creating table: %s", table_name)
+            cursor.execute(";\n".join(TABLE_DEFINITIONS + [SCHEMA_MIGRATIONS_DEFINITION]))
             
             logger.info("All tables created successfully")
             
-            # Check if tables were created
+            # Record the schema version so later boots can skip the DDL
+            cursor.execute(
+                "INSERT INTO schema_migrations (version) VALUES (%s) ON CONFLICT DO NOTHING",
+                (CURRENT_SCHEMA_VERSION,)
+            )
+            
+            # Check if tables were created; pg_tables reads pg_class directly
+            # instead of information_schema's per-row privilege checks
             cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public';
+                SELECT string_agg(tablename, ', ')
+                FROM pg_catalog.pg_tables
+                WHERE schemaname = 'public';
             """)
-            tables = cursor.fetchall()
+            tables = cursor.fetchone()[0]
             if tables:
-                logger.info(f"Tables in database: {', '.join([t[0] for t in tables])}")
+                logger.info("Tables in database: %s", tables)
             else:
                 logger.warning("No tables found after creation - this may indicate a problem")
             
@@ -202,10 +222,10 @@ def create_tables():
             return True
         
         except Exception as e:
-            logger.error(f"Error on attempt {attempt+1}: {str(e)}")
+            logger.error("Error on attempt %s: %s", attempt+1, e)
             if attempt < max_attempts - 1:
                 backoff = min(2 ** attempt, 30)
-                logger.info(f"Retrying in {backoff} seconds...")
+                logger.info("Retrying in %s seconds...", backoff)
                 time.sleep(backoff)
             else:
                 logger.error("Maximum retry attempts reached")
@@ -231,19 +251,9 @@ if __name__ == "__main__":
         if name == "DATABASE_URL" and value != "Not set":
             masked_value = value.split("@")[0].split(":")
             masked_value = f"{masked_value[0]}:****@" + value.split("@")[1]
-            logger.info(f"{name}: {masked_value}")
+            logger.info("%s: %s", name, masked_value)
         elif name != "POSTGRES_PASSWORD":
-            logger.info(f"{name}: {value}")
-    
-    # Check connectivity
-    proxy_domain = os.getenv("RAILWAY_TCP_PROXY_DOMAIN", "ballast.proxy.rlwy.net")
-    proxy_port = os.getenv("RAILWAY_TCP_PROXY_PORT", "11148")
-    if proxy_domain and proxy_port:
-        logger.info(f"Checking connectivity to {proxy_domain}:{proxy_port}...")
-        if check_connectivity(proxy_domain, proxy_port):
-            logger.info(f"✅ Connection to proxy is available")
-        else:
-            logger.warning(f"⚠️ Connection to proxy is not available")
+            logger.info("%s: %s", name, value)
     
     # Create tables
     if create_tables():
@@ -17,7 +17,7 @@ except (ImportError, AssertionError):
 import time
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, text
+from sqlalchemy import desc, func
 
 # Ensure we're in the correct working directory
 if os.path.exists("main.py") and not os.path.samefile("main.py", __file__):
@@ -36,12 +36,13 @@ logger = logging.getLogger("andikar-main")
 
 # Try to import database and models
 try:
-    from database import get_db, engine
+    from database import engine, ping_database
     import models
     from models import Base
     import schemas
     DATABASE_AVAILABLE = True
-except ImportError as e:
+except (ImportError, RuntimeError) as e:
+    # database raises RuntimeError at import when no database is configured
     logger.warning(f"Database modules not available: {e}")
     DATABASE_AVAILABLE = False
 
@@ -57,7 +58,8 @@ except ImportError as e:
 try:
     from admin import admin_router
     ADMIN_AVAILABLE = True
-except ImportError as e:
+except (ImportError, RuntimeError) as e:
+    # admin imports database, which raises RuntimeError when unconfigured
     logger.warning(f"Admin module not available: {e}")
     ADMIN_AVAILABLE = False
 
@@ -95,6 +97,8 @@ except Exception as e:
 # Set up templates if available
 if TEMPLATES_AVAILABLE:
     templates = Jinja2Templates(directory="templates")
+    # Templates do not change in a deployment; skip the per-render mtime check
+    templates.env.auto_reload = os.getenv("DEBUG") == "1"
     
     # Create a basic index.html if it doesn't exist
     index_path = os.path.join("templates", "index.html")
@@ -359,8 +363,7 @@ async def health_check():
     
     if DATABASE_AVAILABLE:
         try:
-            db = next(get_db())
-            db.execute(text("SELECT 1"))
+            await ping_database()
             db_status = "healthy"
         except Exception as e:
             logger.error(f"Database health check failed: {str(e)}")
@@ -7,15 +7,9 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 import datetime
-from sqlalchemy.ext.declarative import declarative_base
-
-# Import Base from database - we need a circular import fix
-try:
-    from database import Base
-except ImportError:
-    # If database hasn't been initialized yet, create a temporary Base
-    from sqlalchemy.ext.declarative import declarative_base
-    Base = declarative_base()
+
+# Shared declarative base; importing it does not create the engine
+from db_base import Base
 
 def generate_uuid():
     """Generate a random UUID string."""
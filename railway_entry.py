@@ -64,7 +64,7 @@ def launch_main_app():
         if pgpassword and proxy_domain and proxy_port:
             # Set DATABASE_URL
             import urllib.parse
-            encoded_password = urllib.parse.quote_plus(pgpassword)
+            encoded_password = urllib.parse.quote(pgpassword, safe="")
             env_vars["DATABASE_URL"] = f"postgresql://{pguser}:{encoded_password}@{proxy_domain}:{proxy_port}/{pgdatabase}"
             logger.info(f"Set DATABASE_URL for database connection")
         
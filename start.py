@@ -63,10 +63,11 @@ def start_main_app():
         if not any(sensitive in key.lower() for sensitive in ["key", "secret", "password", "token"]):
             logger.info(f"  {key}: {value}")
     
-    # Start the main app
+    # Start the main app in this interpreter instead of launching a second
+    # one through the uvicorn CLI, which would redo every import
     try:
-        # Use os.system for simplicity and to avoid blocking issues
-        os.system(f"uvicorn main:app --host 0.0.0.0 --port {port}")
+        from main import app as main_app
+        uvicorn.run(main_app, host="0.0.0.0", port=port)
     except Exception as e:
         logger.error(f"Error starting main app: {e}")
         sys.exit(1)
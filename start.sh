@@ -39,7 +39,7 @@ max_attempts=3
 attempt=1
 while [ $attempt -le $max_attempts ]; do
     echo "Database initialization attempt $attempt/$max_attempts..."
-    if python initialize_database.py; then
+    if python init_db.py; then
         echo "✅ Database initialization successful!"
         break
     else